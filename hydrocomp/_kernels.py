@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""
+:Module: _kernels.py
+
+:Author: Jeremiah Lant
+
+:Email: jlant@usgs.gov
+
+:Purpose:
+Numba compiled kernels for the hydrocomp.py and water.py modules. Importing
+this module requires numba; hydrocomp.py falls back to the functions in 
+statistics.py and water.py falls back to numpy's text parser when numba is 
+not installed.
+
+"""
+
+import numpy as np
+from numba import njit, types
+
+# compiled code is cached to disk so only the first run pays for compilation;
+# fastmath flags are limited to reassociation and contraction so that nan
+# values (missing data) and inf values (division by zero) still propagate
+@njit('(float64[::1], float64[::1], boolean, boolean, boolean)', cache = True, nogil = True, 
+      fastmath = {'reassoc', 'contract'}, error_model = 'numpy')
+def compute_all_stats(modeled, observed, relative, percent, difference):
+    """
+    Compute all the comparison statistics between two arrays in two passes
+    over the data. The first pass computes the means; the second pass
+    computes the error arrays and the sums of squares. Error arrays that are 
+    not wanted are returned empty.
+
+    *Parameters:*
+        modeled : contiguous float64 array of modeled values
+
+        observed : contiguous float64 array of observed values
+
+        relative : boolean to fill the relative error array
+
+        percent : boolean to fill the percent error array
+
+        difference : boolean to fill the percent difference array
+
+    *Return:*
+        relative_error : array of relative error
+
+        percent_error : array of percent error
+
+        percent_difference : array of percent difference
+
+        mean_squared_error : value of mean square error
+
+        r_squared_coeff : coefficient of determination
+
+        nash_sutcliffe_coeff : model efficiency coefficient
+
+    """
+    n = modeled.shape[0]
+
+    relative_error = np.empty(n if relative else 0)
+    percent_error = np.empty(n if percent else 0)
+    percent_difference = np.empty(n if difference else 0)
+
+    # compute mean values of the modeled and observed arrays
+    modeled_sum = 0.0
+    observed_sum = 0.0
+    for i in range(n):
+        modeled_sum += modeled[i]
+        observed_sum += observed[i]
+
+    modeled_mean = modeled_sum / n
+    observed_mean = observed_sum / n
+
+    # compute error arrays and sums of squares
+    squared_error_sum = 0.0
+    modeled_squares_sum = 0.0
+    observed_squares_sum = 0.0
+    cross_products_sum = 0.0
+    for i in range(n):
+        error = modeled[i] - observed[i]
+
+        if relative:
+            relative_error[i] = error / observed[i]
+        if percent:
+            percent_error[i] = (error / observed[i]) * 100
+        if difference:
+            percent_difference[i] = (error / ((modeled[i] + observed[i]) / 2)) * 100
+
+        modeled_deviation = modeled[i] - modeled_mean
+        observed_deviation = observed[i] - observed_mean
+
+        squared_error_sum += error * error
+        modeled_squares_sum += modeled_deviation * modeled_deviation
+        observed_squares_sum += observed_deviation * observed_deviation
+        cross_products_sum += modeled_deviation * observed_deviation
+
+    mean_squared_error = squared_error_sum / n
+    r_squared_coeff = cross_products_sum**2 / (modeled_squares_sum * observed_squares_sum)
+    nash_sutcliffe_coeff = 1 - (squared_error_sum / observed_squares_sum)
+
+    return relative_error, percent_error, percent_difference, mean_squared_error, r_squared_coeff, nash_sutcliffe_coeff
+
+@njit('(float64[:],)', cache = True, nogil = True, error_model = 'numpy')
+def min_max_mean(values):
+    """
+    Compute the minimum, maximum, and mean of an array in a single pass over
+    the data. If the array contains a nan value, then all three are nan.
+
+    *Parameters:*
+        values : array of data
+
+    *Return:*
+        minimum : minimum value
+
+        maximum : maximum value
+
+        mean : mean value
+
+    """
+    minimum = values[0]
+    maximum = values[0]
+    total = 0.0
+    for i in range(values.shape[0]):
+        value = values[i]
+        if np.isnan(value):
+            return np.nan, np.nan, np.nan
+
+        if value < minimum:
+            minimum = value
+        if value > maximum:
+            maximum = value
+        total += value
+
+    return minimum, maximum, total / values.shape[0]
+
+@njit('(float64[::1], float64[::1])', cache = True, nogil = True, 
+      fastmath = {'reassoc', 'contract'}, error_model = 'numpy')
+def nse_and_r2(modeled, observed):
+    """
+    Compute the Nash-Sutcliffe coefficient and the coefficient of 
+    determination from sums accumulated in a single pass over the data. 
+    Neither coefficient changes when the data is shifted, so the values are 
+    shifted by the first observed value to keep the sums of squares small.
+
+    *Parameters:*
+        modeled : contiguous float64 array of modeled values
+
+        observed : contiguous float64 array of observed values
+
+    *Return:*
+        nash_sutcliffe_coeff : model efficiency coefficient
+
+        r_squared_coeff : coefficient of determination
+
+    """
+    n = observed.shape[0]
+    shift = observed[0]
+
+    modeled_sum = 0.0
+    observed_sum = 0.0
+    cross_products_sum = 0.0
+    modeled_squares_sum = 0.0
+    observed_squares_sum = 0.0
+    squared_error_sum = 0.0
+    for i in range(n):
+        m = modeled[i] - shift
+        o = observed[i] - shift
+        error = o - m
+
+        modeled_sum += m
+        observed_sum += o
+        cross_products_sum += m * o
+        modeled_squares_sum += m * m
+        observed_squares_sum += o * o
+        squared_error_sum += error * error
+
+    nash_sutcliffe_coeff = 1 - squared_error_sum / (observed_squares_sum - observed_sum * observed_sum / n)
+    r_squared_coeff = (n * cross_products_sum - modeled_sum * observed_sum)**2 / ((n * modeled_squares_sum - modeled_sum * modeled_sum) * (n * observed_squares_sum - observed_sum * observed_sum))
+
+    return nash_sutcliffe_coeff, r_squared_coeff
+
+# read only array of bytes; the buffer of a string read from a file
+readonly_bytes = types.Array(types.uint8, 1, 'C', readonly = True)
+
+# exact powers of ten; a value with at most 15 significant digits is converted
+# to the nearest float64 with a single multiplication or division by one of 
+# these powers, which gives the same result as float()
+_POWERS_OF_TEN = np.array([float('1e%d' % i) for i in range(23)])
+
+@njit(types.Tuple((types.float64, types.boolean))(readonly_bytes, types.int64, types.int64), cache = True, nogil = True)
+def parse_float(buf, start, end):
+    """
+    Convert the characters between *start* and *end* in a buffer of bytes to a
+    float. Surrounding spaces are ignored and an empty field is nan. Values 
+    that can not be converted exactly, such as values with more than 15 
+    significant digits, large exponents, or characters that are not part of a
+    number, are not converted and are left for float() to convert.
+
+    *Parameters:*
+        buf : array of bytes
+
+        start : index of the first character of the field
+
+        end : index one past the last character of the field
+
+    *Return:*
+        value : converted value
+
+        ok : boolean that is False if the value was not converted
+
+    """
+    while start < end and buf[start] == 32:
+        start += 1
+    while end > start and buf[end - 1] == 32:
+        end -= 1
+    if start == end:
+        return np.nan, True
+
+    negative = False
+    if buf[start] == 45:
+        negative = True
+        start += 1
+    elif buf[start] == 43:
+        start += 1
+
+    # read the digits into an integer mantissa and a power of ten exponent
+    mantissa = 0
+    exponent = 0
+    significant_digits = 0
+    has_digits = False
+    i = start
+    while i < end and buf[i] >= 48 and buf[i] <= 57:
+        mantissa = mantissa * 10 + (buf[i] - 48)
+        if mantissa > 0:
+            significant_digits += 1
+        has_digits = True
+        i += 1
+
+    if i < end and buf[i] == 46:
+        i += 1
+        while i < end and buf[i] >= 48 and buf[i] <= 57:
+            mantissa = mantissa * 10 + (buf[i] - 48)
+            if mantissa > 0:
+                significant_digits += 1
+            exponent -= 1
+            has_digits = True
+            i += 1
+
+    if not has_digits or significant_digits > 15:
+        return 0.0, False
+
+    if i < end and (buf[i] == 101 or buf[i] == 69):
+        i += 1
+        exponent_negative = False
+        if i < end and buf[i] == 45:
+            exponent_negative = True
+            i += 1
+        elif i < end and buf[i] == 43:
+            i += 1
+
+        exponent_value = 0
+        has_exponent_digits = False
+        while i < end and buf[i] >= 48 and buf[i] <= 57:
+            if exponent_value < 1000:
+                exponent_value = exponent_value * 10 + (buf[i] - 48)
+            has_exponent_digits = True
+            i += 1
+
+        if not has_exponent_digits:
+            return 0.0, False
+
+        if exponent_negative:
+            exponent -= exponent_value
+        else:
+            exponent += exponent_value
+
+    if i != end:
+        return 0.0, False
+
+    if mantissa == 0:
+        value = 0.0
+    elif exponent < -22 or exponent > 22:
+        return 0.0, False
+    elif exponent < 0:
+        value = mantissa / _POWERS_OF_TEN[-exponent]
+    else:
+        value = mantissa * _POWERS_OF_TEN[exponent]
+
+    if negative:
+        value = -value
+
+    return value, True
+
+@njit((readonly_bytes, types.int64, types.int64[::1], types.uint8[:, ::1], types.float64[:, ::1]), 
+      cache = True, nogil = True)
+def parse_rows(buf, date_col, col_slots, dates, values):
+    """
+    Parse tab delimited rows of data in a buffer of bytes. The date column is 
+    copied into *dates*, truncated to the width of *dates*, and each numeric 
+    column is converted into its row of *values*. Blank lines and rows that are
+    missing columns are skipped. The fields that parse_float can not convert 
+    are returned so they can be converted with float().
+
+    *Parameters:*
+        buf : array of bytes holding the rows of data
+
+        date_col : index of the date column
+
+        col_slots : array holding the row of *values* for each column index, 
+        or -1 for columns that are not used
+
+        dates : array to fill with the date characters, one row per row of data
+
+        values : array to fill with the numeric values, one column per row of 
+        data
+
+    *Return:*
+        rows : number of rows of data parsed
+
+        skipped : number of rows skipped because they are missing columns
+
+        unconverted : array holding the flat index into *values* and the start
+        and end of each field that was not converted
+
+    """
+    n = buf.shape[0]
+    ncols = col_slots.shape[0]
+    width = dates.shape[1]
+    capacity = values.shape[1]
+
+    unconverted = np.empty((64, 3), dtype = np.int64)
+    nunconverted = 0
+
+    row = 0
+    skipped = 0
+    pos = 0
+    while pos < n:
+        # find the end of the line and strip spaces and carriage returns
+        end = pos
+        while end < n and buf[end] != 10:
+            end += 1
+        next_pos = end + 1
+
+        start = pos
+        while start < end and (buf[start] == 32 or buf[start] == 13):
+            start += 1
+        while end > start and (buf[end - 1] == 32 or buf[end - 1] == 13):
+            end -= 1
+
+        pos = next_pos
+        if start == end:
+            continue
+
+        # walk the fields of the line
+        row_nunconverted = nunconverted
+        col = 0
+        field_start = start
+        i = start
+        while True:
+            if i == end or buf[i] == 9:
+                if col == date_col:
+                    length = min(i - field_start, width)
+                    for k in range(length):
+                        dates[row, k] = buf[field_start + k]
+                    for k in range(length, width):
+                        dates[row, k] = 0
+
+                elif col < ncols and col_slots[col] >= 0:
+                    slot = col_slots[col]
+                    value, ok = parse_float(buf, field_start, i)
+                    if ok:
+                        values[slot, row] = value
+                    else:
+                        if nunconverted == unconverted.shape[0]:
+                            grown = np.empty((2 * unconverted.shape[0], 3), dtype = np.int64)
+                            grown[:nunconverted] = unconverted[:nunconverted]
+                            unconverted = grown
+                        unconverted[nunconverted, 0] = slot * capacity + row
+                        unconverted[nunconverted, 1] = field_start
+                        unconverted[nunconverted, 2] = i
+                        nunconverted += 1
+
+                col += 1
+                if i == end:
+                    break
+                field_start = i + 1
+            i += 1
+
+        # skip a row that is missing columns; the next row overwrites it
+        if col < ncols:
+            nunconverted = row_nunconverted
+            skipped += 1
+        else:
+            row += 1
+
+    return row, skipped, unconverted[:nunconverted]
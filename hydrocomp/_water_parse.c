@@ -0,0 +1,270 @@
+/*
+ * :Module: _water_parse.c
+ *
+ * :Author: Jeremiah Lant
+ *
+ * :Email: jlant@usgs.gov
+ *
+ * :Purpose:
+ * C extension for the water.py module that parses the tab delimited rows of
+ * data in a WATER file without creating a python object for each value.
+ * water.py falls back to the numba compiled kernels or numpy's text parser
+ * when the extension is not built.
+ *
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <string.h>
+
+/* width of the date field; dates are month/day/year strings like 12/31/1999 */
+#define DATE_WIDTH 10
+
+/* fields shorter than this are converted from a buffer on the stack */
+#define FIELD_BUFFER 64
+
+/*
+ * Convert the characters between start and end to a double. Surrounding
+ * spaces are ignored and an empty field is the missing value. The conversion
+ * is the one float() uses, so the values are the same and do not depend on
+ * the locale. Returns -1 with a ValueError set if the field is not a number.
+ */
+static int
+parse_value(const char *start, const char *end, double missing, double *value)
+{
+    char buffer[FIELD_BUFFER];
+    char *field = buffer;
+    Py_ssize_t length;
+
+    while (start < end && *start == ' ')
+        start++;
+    while (end > start && end[-1] == ' ')
+        end--;
+
+    length = end - start;
+    if (length == 0) {
+        *value = missing;
+        return 0;
+    }
+
+    /* the conversion needs a null terminated string */
+    if (length >= FIELD_BUFFER) {
+        field = PyMem_Malloc(length + 1);
+        if (field == NULL) {
+            PyErr_NoMemory();
+            return -1;
+        }
+    }
+    memcpy(field, start, length);
+    field[length] = '\0';
+
+    *value = PyOS_string_to_double(field, NULL, NULL);
+
+    if (field != buffer)
+        PyMem_Free(field);
+
+    if (*value == -1.0 && PyErr_Occurred())
+        return -1;
+
+    return 0;
+}
+
+/* Count the tab delimited columns of a line. */
+static Py_ssize_t
+count_columns(const char *line, const char *line_end)
+{
+    Py_ssize_t columns = 1;
+
+    while ((line = memchr(line, '\t', line_end - line)) != NULL) {
+        columns++;
+        line++;
+    }
+
+    return columns;
+}
+
+PyDoc_STRVAR(parse_doc,
+"parse(text, date_col, col_slots, missing) -> (values, dates, rows, skipped)\n\
+\n\
+Parse the tab delimited rows of data in text. The date column is copied\n\
+into dates, truncated to 10 characters, and each numeric column is\n\
+converted into its row of values. Blank lines and rows that are missing\n\
+columns are skipped.\n\
+\n\
+*Parameters:*\n\
+    text : string holding the rows of data\n\
+\n\
+    date_col : index of the date column\n\
+\n\
+    col_slots : list holding the row of values for each column index, or -1\n\
+    for columns that are not used\n\
+\n\
+    missing : value of an empty field\n\
+\n\
+*Return:*\n\
+    values : bytearray of float64 values with one row for each numeric column\n\
+    and one column for each line of text\n\
+\n\
+    dates : bytearray of 10 character dates, one for each line of text\n\
+\n\
+    rows : number of rows of data parsed\n\
+\n\
+    skipped : number of rows skipped because they are missing columns\n");
+
+static PyObject *
+parse(PyObject *self, PyObject *args)
+{
+    const char *text, *end, *line, *line_end, *next_line, *field, *field_end;
+    Py_ssize_t text_length, date_col, ncols, nslots = 0, capacity = 0;
+    Py_ssize_t rows = 0, skipped = 0, col, length, i;
+    Py_ssize_t *col_slots = NULL;
+    PyObject *slots_arg, *slots_seq, *values_obj = NULL, *dates_obj = NULL;
+    PyObject *result = NULL;
+    double missing, *values;
+    char *dates;
+
+    if (!PyArg_ParseTuple(args, "s#nOd:parse", &text, &text_length, &date_col, &slots_arg, &missing))
+        return NULL;
+
+    slots_seq = PySequence_Fast(slots_arg, "col_slots must be a sequence");
+    if (slots_seq == NULL)
+        return NULL;
+
+    ncols = PySequence_Fast_GET_SIZE(slots_seq);
+    if (date_col < 0 || date_col >= ncols) {
+        PyErr_SetString(PyExc_ValueError, "Date column is not in col_slots!");
+        goto done;
+    }
+
+    col_slots = PyMem_New(Py_ssize_t, ncols);
+    if (col_slots == NULL) {
+        PyErr_NoMemory();
+        goto done;
+    }
+
+    for (i = 0; i < ncols; i++) {
+        col_slots[i] = PyNumber_AsSsize_t(PySequence_Fast_GET_ITEM(slots_seq, i), PyExc_OverflowError);
+        if (col_slots[i] == -1 && PyErr_Occurred())
+            goto done;
+        if (col_slots[i] >= nslots)
+            nslots = col_slots[i] + 1;
+    }
+
+    /* allocate for every line; blank lines and skipped rows are trimmed off */
+    end = text + text_length;
+    line = text;
+    while (line < end) {
+        capacity++;
+        line_end = memchr(line, '\n', end - line);
+        if (line_end == NULL)
+            break;
+        line = line_end + 1;
+    }
+
+    values_obj = PyByteArray_FromStringAndSize(NULL, nslots * capacity * sizeof(double));
+    dates_obj = PyByteArray_FromStringAndSize(NULL, capacity * DATE_WIDTH);
+    if (values_obj == NULL || dates_obj == NULL)
+        goto done;
+
+    values = (double *)PyByteArray_AS_STRING(values_obj);
+    dates = PyByteArray_AS_STRING(dates_obj);
+
+    line = text;
+    while (line < end) {
+        line_end = memchr(line, '\n', end - line);
+        if (line_end == NULL)
+            line_end = end;
+        next_line = line_end < end ? line_end + 1 : end;
+
+        /* strip spaces and carriage returns at the ends of the line */
+        while (line < line_end && (*line == ' ' || *line == '\r'))
+            line++;
+        while (line_end > line && (line_end[-1] == ' ' || line_end[-1] == '\r'))
+            line_end--;
+
+        if (line == line_end) {
+            line = next_line;
+            continue;
+        }
+
+        /* walk the fields of the line */
+        col = 0;
+        field = line;
+        for (;;) {
+            field_end = memchr(field, '\t', line_end - field);
+            if (field_end == NULL)
+                field_end = line_end;
+
+            if (col == date_col) {
+                length = field_end - field < DATE_WIDTH ? field_end - field : DATE_WIDTH;
+                memcpy(dates + rows * DATE_WIDTH, field, length);
+                memset(dates + rows * DATE_WIDTH + length, 0, DATE_WIDTH - length);
+            }
+            else if (col < ncols && col_slots[col] >= 0) {
+                if (parse_value(field, field_end, missing, values + col_slots[col] * capacity + rows) < 0) {
+                    /* a row that is missing columns is skipped before its
+                       values are converted */
+                    if (count_columns(line, line_end) >= ncols)
+                        goto done;
+                    PyErr_Clear();
+                    break;
+                }
+            }
+
+            col++;
+            if (field_end == line_end)
+                break;
+            field = field_end + 1;
+        }
+
+        /* skip a row that is missing columns; the next row overwrites it */
+        if (col < ncols)
+            skipped++;
+        else
+            rows++;
+
+        line = next_line;
+    }
+
+    result = Py_BuildValue("OOnn", values_obj, dates_obj, rows, skipped);
+
+done:
+    Py_XDECREF(values_obj);
+    Py_XDECREF(dates_obj);
+    PyMem_Free(col_slots);
+    Py_DECREF(slots_seq);
+    return result;
+}
+
+static PyMethodDef water_parse_methods[] = {
+    {"parse", parse, METH_VARARGS, parse_doc},
+    {NULL, NULL, 0, NULL}
+};
+
+PyDoc_STRVAR(module_doc, "Parse the rows of data in a WATER file.");
+
+#if PY_MAJOR_VERSION >= 3
+
+static struct PyModuleDef water_parse_module = {
+    PyModuleDef_HEAD_INIT,
+    "_water_parse",
+    module_doc,
+    -1,
+    water_parse_methods
+};
+
+PyMODINIT_FUNC
+PyInit__water_parse(void)
+{
+    return PyModule_Create(&water_parse_module);
+}
+
+#else
+
+PyMODINIT_FUNC
+init_water_parse(void)
+{
+    Py_InitModule3("_water_parse", water_parse_methods, module_doc);
+}
+
+#endif
@@ -9,59 +9,119 @@
 :Purpose: 
 Helper functions for the hydrocomp.py module. Currently contains 
 functions to subset dates and find common date ranges betweent the model and 
-observed data files.
+observed data files, and to import the optional C extension and numba 
+compiled kernels.
 
 """
 
 import numpy as np
+from collections import namedtuple
+
+# subset of a dates array and its data array
+Subset = namedtuple('Subset', 'dates data')
 
 def subset_data(dates, data, start_date, end_date):
     """   
     Subset the *dates* and *data* arrays to match the range of the *start_date*
     and *end_date*. If *start_date* and *end_date* are not within the range of dates
     specified in *dates*, then the *start_date* and *end_date* are set to the
-    first and last dates in the array *dates*.
+    first and last dates in the array *dates*. The subset starts at the first
+    date on or after *start_date* and ends at the last date on or before
+    *end_date*. A ValueError is raised if the range does not overlap *dates* 
+    or no dates fall between *start_date* and *end_date*.
             
     *Parameters:*  
-        dates :  array of dates as datetime objects 
+        dates :  sorted array of dates as datetime objects or numpy datetime64 values
         
         data : array of data
         
-        start_date : datetime object
+        start_date : datetime object or numpy datetime64 value
         
-        end_date : datetime object
+        end_date : datetime object or numpy datetime64 value
     
     *Return:*
-        data : dictionary holding arrays of date and data subset
+        subset : Subset named tuple holding the dates and data subset; the 
+        arrays are views of *dates* and *data*, not copies
 
     """ 
     if len(dates) != len(data):
         raise ValueError("Lengths of dates and data are not equal!")
         
     else:
-        # if start_date or end_date are not within dates, set them to the 
-        # first and last elements in dates
-        if start_date < dates[0] or start_date > dates[-1]:
-            start_date = dates[0]  
-        
-        if end_date > dates[-1] or end_date < dates[0]:
-            end_date = dates[-1] 
+        # search datetime64 dates through their int64 view; the start and end 
+        # dates are converted to the same unit so the comparisons are integer
+        # comparisons instead of the slower datetime64 ones
+        if dates.dtype.kind == 'M':
+            search_dates = dates.view('i8')
             
-        # find start and ending indices; have to convert idx from array to int to slice
-        start_idx = int(np.where(dates == start_date)[0])
-        end_idx = int(np.where(dates == end_date)[0])
+            # keep the time of day of the start and end dates, then convert 
+            # them to the unit of dates; the conversion rounds down, so round
+            # a start date that falls within a unit up to the next one, i.e. a
+            # start at 13:15 begins at the next daily date
+            bounds = np.array([start_date, end_date], dtype = np.promote_types(dates.dtype, 'datetime64[us]'))
+            search_bounds = bounds.astype(dates.dtype)
+            start_date, end_date = search_bounds.view('i8')
+            if search_bounds[0] < bounds[0]:
+                start_date += 1
+        else:
+            # datetime objects do not compare with numpy datetime64 values, so
+            # convert the start and end dates to datetime objects
+            search_dates = dates
+            start_date, end_date = np.array([start_date, end_date], dtype = 'datetime64[us]').astype(object)
+        
+        # find start and ending indices; dates are sorted so use a binary search
+        # instead of scanning the whole array for a match
+        start_idx = np.searchsorted(search_dates, start_date, side = 'left')
+        end_idx = np.searchsorted(search_dates, end_date, side = 'right') - 1
+        
+        # the range starts after the last date or ends before the first date, 
+        # so it does not overlap dates at all; fail here instead of comparing 
+        # unrelated periods. A start date before the first date or an end date
+        # after the last date already gives the first or last index.
+        if start_idx == len(dates) or end_idx < 0:
+            raise ValueError("Dates do not overlap the start date and end date!")
         
-        # subset variable and date range; 
+        # no dates fall between start_date and end_date; fail here instead of
+        # returning empty arrays that break the comparison later on
+        if start_idx > end_idx:
+            raise ValueError("No dates between start date and end date!")
+        
+        # subset variable and date range; slices are views of dates and data
         date_subset = dates[start_idx:end_idx + 1] 
         data_subset = data[start_idx:end_idx + 1] 
         
-        # put data into a dictionary
-        data = {
-            'dates': date_subset, 
-            'data': data_subset
-        }    
+        return Subset(dates = date_subset, data = data_subset)
+
+def import_water_parse():
+    """
+    Import the _water_parse C extension that parses the rows of a WATER file.
+    
+    *Return:*
+        _water_parse : the _water_parse module or None if the extension is not
+        built
+    """
+    try:
+        import _water_parse
+    except ImportError:
+        _water_parse = None
+        
+    return _water_parse
+
+def import_kernels():
+    """
+    Import the numba compiled kernels. The import is done when the kernels are
+    first needed rather than at module level so importing the modules that use
+    them does not pay for loading numba.
+    
+    *Return:*
+        _kernels : the _kernels module or None if numba is not installed
+    """
+    try:
+        import _kernels
+    except ImportError:
+        _kernels = None
         
-        return data
+    return _kernels
 
 def find_start_end_dates(model_dates, observed_dates):
     """  
@@ -69,21 +129,27 @@ def find_start_end_dates(model_dates, observed_dates):
     objects.
 
     *Parameters:*  
-        model_dates : array of datetime objects
+        model_dates : array of datetime objects or numpy datetime64 values
         
-        observed_dates : array of datetime objects
+        observed_dates : array of datetime objects or numpy datetime64 values
     
     *Return:*
         overlap_dates : array of datetime objects
 
     """ 
+    # convert the first and last dates to integer microseconds so the 
+    # comparisons are plain integer comparisons for both datetime objects and
+    # numpy datetime64 arrays
+    model_ends = np.array([model_dates[0], model_dates[-1]], dtype = 'datetime64[us]').view('i8')
+    observed_ends = np.array([observed_dates[0], observed_dates[-1]], dtype = 'datetime64[us]').view('i8')
+    
     # pick later of two dates for start date; pick earlier of two dates for end date
-    if observed_dates[0] > model_dates[0]: 
+    if observed_ends[0] > model_ends[0]: 
         start_date = observed_dates[0]         
     else:
         start_date = model_dates[0]
     
-    if observed_dates[-1] >  model_dates[-1]: 
+    if observed_ends[-1] > model_ends[-1]: 
         end_date = model_dates[-1]        
     else:
         end_date = observed_dates[-1]
@@ -20,11 +20,14 @@ is created if any errors are found in the data file.
 
 #!/usr/bin/env python
 import os
+import errno
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-import Tkinter, tkFileDialog
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import logging
+from multiprocessing.pool import ThreadPool
 
 # my modules
 import nwispy
@@ -32,8 +35,49 @@ import water
 import statistics
 import helpers
 
+# date format used for the x axis locations in the toolbar and the text box 
+# properties; shared by all plots
+_DATE_FORMATTER = mdates.DateFormatter('%Y-%m-%d')
+_PATCH_PROPERTIES = {'boxstyle': 'round',
+                     'facecolor': 'wheat',
+                     'alpha': 0.5
+                     }
 
-def compare(parameter_name, model_name, observed_name, modeled_parameter, observed_parameter, dates):
+# most markers drawn on a line; longer series mark every nth point only
+_MAX_MARKERS = 500
+
+# names of all the statistics that compare() can compute
+STATISTICS = ('relative_error', 'percent_error', 'percent_difference', 
+              'mean_squared_error', 'r_squared_coeff', 'nash_sutcliffe_coeff')
+
+def read_files(nwis_file, water_file):
+    """
+    Read the observed (USGS NWIS) file and the model (WATER) file at the same
+    time in two threads. Nothing is shared between the two readers, so the 
+    total time is about the time of the slower read instead of the sum of
+    both. An error raised by either reader is raised again here.
+    
+    *Parameters:*
+        nwis_file : string path of the observed file
+        
+        water_file : string path of the model file
+        
+    *Return:*
+        nwis_data : dictionary holding the observed data
+        
+        water_data : dictionary holding the model data
+    """
+    pool = ThreadPool(processes = 2)
+    try:
+        nwis_result = pool.apply_async(nwispy.read_nwis, (nwis_file,))
+        water_result = pool.apply_async(water.read_water, (water_file,))
+        
+        return nwis_result.get(), water_result.get()
+    finally:
+        pool.close()
+        pool.join()
+
+def compare(parameter_name, model_name, observed_name, modeled_parameter, observed_parameter, dates, include_stats = STATISTICS):
     """    
     Collect information about and compute comparision statistics between param1 and param2
             
@@ -49,6 +93,12 @@ def compare(parameter_name, model_name, observed_name, modeled_parameter, observ
         observed_parameter : array of data; i.e. discharge, stage, sediment concentration, etc.
         
         dates :  array of datetime objects
+        
+        include_stats : sequence of the names of the statistics to compute; 
+        defaults to all the names in STATISTICS
+        
+        ** modeled_parameter and observed_parameter are converted to contiguous 
+        float64 arrays, and are stored in comp_data as converted.
     
     *Return:*
         comp_data : dictionary holding information, data, and statistics
@@ -76,7 +126,7 @@ def compare(parameter_name, model_name, observed_name, modeled_parameter, observ
             
             'percent_error': percent_error_array,
             
-            'percent_difference': percent_difference_error_array,
+            'percent_difference': percent_difference_array,
             
             'mean_squared_error': mean_squared_error,
             
@@ -84,12 +134,19 @@ def compare(parameter_name, model_name, observed_name, modeled_parameter, observ
             
             'nash_sutcliffe_coeff': nash_sutcliffe_coeff
         }
+        
+        ** statistics not in include_stats are set to None
 
     """
     if len(modeled_parameter) != len(observed_parameter):
         raise ValueError("Lengths of modeled and observed are not equal!")
     
     else:
+        # the statistics are computed on contiguous float64 arrays; convert
+        # the data once here so none of the statistics copy or convert it again
+        modeled_parameter = np.ascontiguousarray(modeled_parameter, dtype = np.float64)
+        observed_parameter = np.ascontiguousarray(observed_parameter, dtype = np.float64)
+        
         # create a dictionary to hold data, information, and stats
         comp_data = {
             'parameter_name': parameter_name,
@@ -107,18 +164,42 @@ def compare(parameter_name, model_name, observed_name, modeled_parameter, observ
             'relative_error': None,
             'percent_error': None,
             'percent_difference': None,
+            'mean_squared_error': None,
             'r_squared_coeff': None,
             'nash_sutcliffe_coeff': None
         }    
         
-        # compute stats on data
-        stats['relative_error'] = statistics.relative_error(x = modeled_parameter, x_true = observed_parameter)
-        stats['percent_error'] = statistics.percent_error(x = modeled_parameter, x_true = observed_parameter)
-        stats['percent_difference'] = statistics.percent_difference(x = modeled_parameter, x_true = observed_parameter)
-        stats['mean_squared_error'] = statistics.mean_squared_error(x = modeled_parameter, x_true = observed_parameter)
-
-        stats['r_squared_coeff'] = statistics.r_squared(modeled = modeled_parameter, observed = observed_parameter)
-        stats['nash_sutcliffe_coeff'] = statistics.nash_sutcliffe(modeled = modeled_parameter, observed = observed_parameter)
+        # compute stats on data; the compiled kernel computes all the stats in
+        # a single traversal instead of one traversal per statistic and only 
+        # fills the error arrays that are included
+        _kernels = helpers.import_kernels()
+        if _kernels is not None:
+            results = _kernels.compute_all_stats(modeled_parameter, observed_parameter, 
+                                                 'relative_error' in include_stats,
+                                                 'percent_error' in include_stats,
+                                                 'percent_difference' in include_stats)
+                                                 
+            for key, value in zip(STATISTICS, results):
+                if key in include_stats:
+                    stats[key] = value
+        
+        else:
+            if 'relative_error' in include_stats:
+                stats['relative_error'] = statistics.relative_error(x = modeled_parameter, x_true = observed_parameter)
+            if 'percent_error' in include_stats:
+                stats['percent_error'] = statistics.percent_error(x = modeled_parameter, x_true = observed_parameter)
+            if 'percent_difference' in include_stats:
+                stats['percent_difference'] = statistics.percent_difference(x = modeled_parameter, x_true = observed_parameter)
+            if 'mean_squared_error' in include_stats:
+                stats['mean_squared_error'] = statistics.mean_squared_error(x = modeled_parameter, x_true = observed_parameter)
+            # both coefficients come from the same sums, so compute them 
+            # together when both are wanted
+            if 'r_squared_coeff' in include_stats and 'nash_sutcliffe_coeff' in include_stats:
+                stats['nash_sutcliffe_coeff'], stats['r_squared_coeff'] = statistics.nse_and_r2(modeled = modeled_parameter, observed = observed_parameter)
+            elif 'r_squared_coeff' in include_stats:
+                stats['r_squared_coeff'] = statistics.r_squared(modeled = modeled_parameter, observed = observed_parameter)
+            elif 'nash_sutcliffe_coeff' in include_stats:
+                stats['nash_sutcliffe_coeff'] = statistics.nash_sutcliffe(modeled = modeled_parameter, observed = observed_parameter)
     
         comp_data['stats'] = stats
     
@@ -142,120 +223,158 @@ def print_comp_data(comp_data):
     print 'Observed Name: ', comp_data['observed_name']
     print 'Timestep: ', comp_data['timestep']    
     
-    print 'Mean Squared Error: %.2f' % comp_data['stats']['mean_squared_error']
-    print 'R-Squared: %.2f' % comp_data['stats']['r_squared_coeff']
-    print 'Nash-Sutcliffe: %.2f' % comp_data['stats']['nash_sutcliffe_coeff']
+    # print the statistics that were computed
+    if comp_data['stats']['mean_squared_error'] is not None:
+        print 'Mean Squared Error: %.2f' % comp_data['stats']['mean_squared_error']
+    if comp_data['stats']['r_squared_coeff'] is not None:
+        print 'R-Squared: %.2f' % comp_data['stats']['r_squared_coeff']
+    if comp_data['stats']['nash_sutcliffe_coeff'] is not None:
+        print 'Nash-Sutcliffe: %.2f' % comp_data['stats']['nash_sutcliffe_coeff']
         
-def plot_comp_data(comp_data, is_visible = True, save_path = None):
+def plot_series(ax, dates, series, title, ylabel, text, reference_line = False, draggable_legend = True):
     """   
-    Plot information about the parameter being compared and the comparision statistics 
+    Plot one or more series against *dates* on *ax* along with a grid, title, 
+    axis labels, legend, and a text box.
     
     *Parameters:*
-        comp_data : dictionary holding information, data, and statistics
+        ax : matplotlib Axes to plot on
+        
+        dates : array of datetime objects
+        
+        series : list of tuples holding an array of data and a dictionary of 
+        keyword arguments passed to ax.plot()
+        
+        title : string of the plot title
+        
+        ylabel : string of the y axis label
+        
+        text : string shown in a text box on the plot
+        
+        reference_line : boolean to draw a dashed reference line at zero
+        
+        draggable_legend : boolean to let the legend be dragged with the mouse;
+        only useful on a figure that is shown
         
     *Return:*
-        no returns
+        lines : list of the matplotlib Line2D objects of the series
+        
+        text : matplotlib Text object of the text box
     """ 
-    # plot parameter
-    fig = plt.figure(figsize=(12,10))
-
-    ax = fig.add_subplot(111)
     ax.grid(True)
-    ax.set_title(comp_data['model_name'] + ' vs. ' + comp_data['observed_name'] + ' (' + comp_data['timestep'].__str__() +')')
+    ax.set_title(title)
     ax.set_xlabel('date')
-    ax.set_ylabel(comp_data['parameter_name'])
+    ax.set_ylabel(ylabel)
 
-    plt.plot(comp_data['dates'], comp_data['observed_parameter'], color = 'b', marker = 'o', label = comp_data['observed_name'])
-    plt.plot(comp_data['dates'], comp_data['modeled_parameter'], color = 'g', marker = 'o', label = comp_data['model_name'])
+    lines = []
+    for values, plot_kwargs in series:
+        line, = ax.plot(dates, values, **plot_kwargs)
+        lines.append(line)
+
+    # draw the reference line after the series so it does not affect the 
+    # autoscaling of the date axis
+    if reference_line:
+        ax.axhline(0, color = 'k', linestyle = '--', label = 'reference line')
     
     # rotate and align the tick labels so they look better   
     plt.setp(ax.xaxis.get_majorticklabels(), rotation = 30)
     
     # use a more precise date string for the x axis locations in the toolbar
-    ax.fmt_xdata = mdates.DateFormatter('%Y-%m-%d')
+    ax.fmt_xdata = _DATE_FORMATTER
      
     # legend; make it transparent    
     handles, labels = ax.get_legend_handles_labels()
     legend = ax.legend(handles, labels, fancybox = True)
     legend.get_frame().set_alpha(0.5)
-    legend.draggable(state=True)
+    if draggable_legend:
+        legend.draggable(state=True)
     
     # show text on graph; use matplotlib.patch.Patch properies and bbox
-    text = 'R_squared = %.2f\nNash-Sutcliffe = %.2f' % (comp_data['stats']['r_squared_coeff'], comp_data['stats']['nash_sutcliffe_coeff'])
-    patch_properties = {'boxstyle': 'round',
-                        'facecolor': 'wheat',
-                        'alpha': 0.5
-                        }
-                   
-    ax.text(0.05, 0.95, text, transform = ax.transAxes, fontsize = 14, 
-            verticalalignment = 'top', horizontalalignment = 'left', bbox = patch_properties)
-
-    # save plots
-    if save_path:        
-        # set the size of the figure to be saved
-        curr_fig = plt.gcf()
-        curr_fig.set_size_inches(12, 10)
-        plt.savefig(save_path + '/' + comp_data['model_name'] + ' vs. ' + comp_data['observed_name'] + '.png', dpi = 100)
-        
-    # show plots
-    if is_visible:
-        plt.show()
-    else:
-        plt.close()
+    text = ax.text(0.05, 0.95, text, transform = ax.transAxes, fontsize = 14, 
+                   verticalalignment = 'top', horizontalalignment = 'left', bbox = _PATCH_PROPERTIES)
+    
+    return lines, text
+        
+def plot_comp_data(comp_data, is_visible = True, save_path = None):
+    """   
+    Plot information about the parameter being compared and the comparision statistics 
+    
+    *Parameters:*
+        comp_data : dictionary holding information, data, and statistics
+        
+    *Return:*
+        no returns
+    """ 
+    title = '%s vs. %s (%s)' % (comp_data['model_name'], comp_data['observed_name'], comp_data['timestep'])
+    
+    # plot parameter; show the coefficients that were computed
+    text_lines = []
+    if comp_data['stats']['r_squared_coeff'] is not None:
+        text_lines.append('R_squared = %.2f' % comp_data['stats']['r_squared_coeff'])
+    if comp_data['stats']['nash_sutcliffe_coeff'] is not None:
+        text_lines.append('Nash-Sutcliffe = %.2f' % comp_data['stats']['nash_sutcliffe_coeff'])
+        
+    # markers on every point of a long series cost more to draw than they show
+    markevery = max(1, len(comp_data['dates']) // _MAX_MARKERS)
+    
+    plots = [{
+        'filename': '%s vs. %s' % (comp_data['model_name'], comp_data['observed_name']),
+        'ylabel': comp_data['parameter_name'],
+        'series': [
+            (comp_data['observed_parameter'], {'color': 'b', 'marker': 'o', 'markevery': markevery, 'label': comp_data['observed_name']}),
+            (comp_data['modeled_parameter'], {'color': 'g', 'marker': 'o', 'markevery': markevery, 'label': comp_data['model_name']})
+            ],
+        'text': '\n'.join(text_lines),
+        'reference_line': False
+    }]
 
-    # plot each statistic
-    includes = ['relative_error', 'percent_error', 'percent_difference']
-    for key, values in comp_data['stats'].iteritems():
-        if key in includes:
-            # plot stat
-            fig = plt.figure(figsize=(12,10))
+    # plot each statistic that was computed; the numba kernel finds the min, 
+    # max, and mean in a single pass instead of three
+    _kernels = helpers.import_kernels()
+    for key in ('relative_error', 'percent_error', 'percent_difference'):
+        values = comp_data['stats'][key]
+        if values is None:
+            continue
         
-            ax = fig.add_subplot(111)
-            ax.grid(True)
-            ax.set_title(comp_data['model_name'] + ' vs. ' + comp_data['observed_name'] + ' (' + comp_data['timestep'].__str__() +')')
-            ax.set_xlabel('date')
-            ax.set_ylabel(key.replace('_'," "))
+        if _kernels is not None:
+            stat_min, stat_max, stat_mean = _kernels.min_max_mean(values)
+        else:
+            stat_min, stat_max, stat_mean = values.min(), values.max(), values.mean()
+            
+        plots.append({
+            'filename': key,
+            'ylabel': key.replace('_'," "),
+            'series': [(values, {'color': 'r', 'label': key.replace('_'," ")})],
+            'reference_line': True,
+            'text': 'Mean = %.2f\nMax = %.2f\nMin = %.2f' % (stat_mean, stat_max, stat_min)
+        })
+    
+    # plots that are only saved are drawn directly on an Agg canvas instead
+    # of going through pyplot and the interactive backend; a single figure is
+    # cleared and reused for each plot so its canvas buffer is only allocated 
+    # once. Their legends are not made draggable since there is no mouse to
+    # drag them with, and a draggable legend leaves callbacks on the canvas
+    # that clearing the figure breaks
+    if not is_visible:
+        fig = Figure(figsize=(12,10))
+        FigureCanvasAgg(fig)
+    
+    for plot in plots:
+        if is_visible:
+            fig = plt.figure(figsize=(12,10))
+        else:
+            fig.clear()
         
-            plt.plot(comp_data['dates'], np.zeros(len(comp_data['dates'])), color = 'k', linestyle = '--', label = 'reference line')
-            plt.plot(comp_data['dates'], values, color = 'r', label = key.replace('_'," "))
-            
-            # rotate and align the tick labels so they look better   
-            plt.setp(ax.xaxis.get_majorticklabels(), rotation = 30)
-            
-            # use a more precise date string for the x axis locations in the
-            # toolbar
-            ax.fmt_xdata = mdates.DateFormatter('%Y-%m-%d')
-             
-            # legend; make it transparent    
-            handles, labels = ax.get_legend_handles_labels()
-            legend = ax.legend(handles, labels, fancybox = True)
-            legend.get_frame().set_alpha(0.5)
-            legend.draggable(state=True)
+        ax = fig.add_subplot(111)
+        plot_series(ax, comp_data['dates'], plot['series'], title, plot['ylabel'], plot['text'], plot['reference_line'], 
+                    draggable_legend = is_visible)
+    
+        # save plots
+        if save_path:        
+            fig.savefig(os.path.join(save_path, plot['filename'] + '.png'), dpi = 100)
             
-            # show text on graph; use matplotlib.patch.Patch properies and bbox
-            text = 'Mean = %.2f\nMax = %.2f\nMin = %.2f' % (np.mean(values), np.max(values), np.min(values))
-            patch_properties = {'boxstyle': 'round',
-                                'facecolor': 'wheat',
-                                'alpha': 0.5
-                                }
-                           
-            ax.text(0.05, 0.95, text, transform = ax.transAxes, fontsize = 14, 
-                    verticalalignment = 'top', horizontalalignment = 'left', bbox = patch_properties)
-        
-            # save plots
-            if save_path:        
-                # set the size of the figure to be saved
-                curr_fig = plt.gcf()
-                curr_fig.set_size_inches(12, 10)
-                plt.savefig(save_path + '/' + key + '.png', dpi = 100)
-                
-            # show plots
-            if is_visible:
-                plt.show()
-            else:
-                plt.close()
-        else:
-            pass
+    # show all plots at once
+    if is_visible:
+        plt.show()
     
         
 def main():
@@ -267,16 +386,23 @@ def main():
     data file.
     """ 
     
+    # the dialog modules are only needed when the module is run as a script, 
+    # so they are imported here; importing the module for its functions does
+    # not load them
+    import Tkinter, tkFileDialog
+    
+    # create one hidden root window shared by both file dialogs
+    root = Tkinter.Tk() 
+    root.withdraw()
+    file_format = [('Text file','*.txt')]  
+    
     # get user input about which parameter to compare
     print ''
     print '** User Input **'
     observed_name = raw_input('What is a descriptive name for the *OBSERVED* data? ')
             
     # get observed file    
-    root = Tkinter.Tk() 
-    file_format = [('Text file','*.txt')]  
-    nwis_file = tkFileDialog.askopenfilename(title = 'Select *OBSERVED* File', filetypes = file_format)
-    root.destroy()
+    nwis_file = tkFileDialog.askopenfilename(parent = root, title = 'Select *OBSERVED* File', filetypes = file_format)
     
     # get user input about which parameter to compare
     print ''
@@ -284,9 +410,7 @@ def main():
     model_name = raw_input('What is a descriptive name for the *MODEL* data file? ')
             
     # get modeled file    
-    root = Tkinter.Tk() 
-    file_format = [('Text file','*.txt')]  
-    water_file = tkFileDialog.askopenfilename(title = 'Select *MODEL* output File', filetypes = file_format)
+    water_file = tkFileDialog.askopenfilename(parent = root, title = 'Select *MODEL* output File', filetypes = file_format)
     root.destroy()
     
     if nwis_file and water_file:
@@ -295,31 +419,33 @@ def main():
             # get directory and filename from data file
             dirname, filename = os.path.split(os.path.abspath(nwis_file))
             
-            # make a directory called figs to hold the plots            
-            figs_path = dirname + '/figs'
-            if not os.path.exists(figs_path):
-                os.makedirs(figs_path)            
+            # make a directory called figs to hold the plots; try to create it
+            # and ignore the error if it already exists rather than checking
+            # for it first
+            figs_path = os.path.join(dirname, 'figs')
+            try:
+                os.makedirs(figs_path)
+            except OSError as error:
+                if error.errno != errno.EEXIST:
+                    raise
             
             # log any errors or warnings found in file; save to data file directory
-            logging.basicConfig(filename = dirname + '/nwis_error.log', filemode = 'w', level=logging.DEBUG)
+            logging.basicConfig(filename = os.path.join(dirname, 'nwis_error.log'), filemode = 'w', level=logging.DEBUG)
             
-            # process observed file  
+            # process observed and modeled files at the same time
             print ''
             print '** Processing Observed Data **'
             print nwis_file
-            nwis_data = nwispy.read_nwis(nwis_file)
+            print ''
+            print '** Processing Modeled Data **'
+            print water_file
+            nwis_data, water_data = read_files(nwis_file, water_file)
             
             # print observed information
             print ''
             print '** Observed File Information **'
             nwispy.print_nwis(nwis_data = nwis_data)
             
-            # process modeled file
-            print ''
-            print '** Processing Modeled Data **'
-            print water_file
-            water_data = water.read_water(water_file)
-            
             # print modeled information
             print ''
             print '** Modeled File Information **'
@@ -335,51 +461,36 @@ def main():
             print '** Parameter Being Compared **'
             print user_parameter            
             
-            # get parameter from observed file        
-            for parameter in nwis_data['parameters']:
-                if user_parameter in parameter['description'].lower():
-                    nwis_parameter = parameter['data']                
-                else:
-                    print user_parameter + ' parameter does not exist in observed file'            
+            # get parameter from observed file; use the first parameter whose
+            # description contains the user parameter
+            nwis_parameter = next((parameter['data'] for parameter in nwis_data['parameters'] 
+                                   if user_parameter in parameter['description'].lower()), None)
+            if nwis_parameter is None:
+                raise ValueError(user_parameter + ' parameter does not exist in observed file')
             
             # get parameter from modeled file
-            if user_parameter in water_data.keys():
+            if user_parameter in water_data:
                 water_parameter = water_data[user_parameter]
             else:
-                print user_parameter + ' parameter does not exist in model file'  
+                raise ValueError(user_parameter + ' parameter does not exist in model file')
             
             # subset modeled data and the observed data by finding common date range
             # find common start date and end date between the data sets
             start_date, end_date = helpers.find_start_end_dates(model_dates = water_data['date'], observed_dates = nwis_data['dates'])
             
-            # subset the water data to match the range of the nwis data
-            subset_kwargs = {
-                'dates': water_data['date'],
-                'data': water_parameter,
-                'start_date': start_date,
-                'end_date': end_date
-                }
-                
-            water_data_subset = helpers.subset_data(**subset_kwargs)    
-            
-            # subset the water data to match the range of the nwis data
-            subset_kwargs = {
-                'dates': nwis_data['dates'],
-                'data': nwis_parameter,
-                'start_date': start_date,
-                'end_date': end_date
-                }
-                
-            nwis_data_subset = helpers.subset_data(**subset_kwargs) 
+            # subset the water data and the nwis data to the common date range; the
+            # subsets are views of the data, not copies
+            water_data_subset = helpers.subset_data(dates = water_data['date'], data = water_parameter, start_date = start_date, end_date = end_date)
+            nwis_data_subset = helpers.subset_data(dates = nwis_data['dates'], data = nwis_parameter, start_date = start_date, end_date = end_date)
 
             # compare parameters and compute stats           
             compare_kwargs = {
                 'parameter_name': user_parameter,
                 'model_name': model_name,
                 'observed_name': observed_name,
-                'modeled_parameter': water_data_subset['data'],
-                'observed_parameter': nwis_data_subset['data'],
-                'dates': nwis_data_subset['dates']
+                'modeled_parameter': water_data_subset.data,
+                'observed_parameter': nwis_data_subset.data,
+                'dates': nwis_data_subset.dates
                 }
               
             comp_data = compare(**compare_kwargs)
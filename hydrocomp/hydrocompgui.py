@@ -23,353 +23,449 @@ slider and a keypress of 'Q' or 'q' de-activates the slider.
 #!/usr/bin/env python
 
 import numpy as np
+from collections import OrderedDict
 import matplotlib.pyplot as plt
 from matplotlib.widgets import SpanSelector
-import Tkinter, tkFileDialog
 import matplotlib.dates as mdates
-import datetime
+
+# let the Agg renderer drop line segments that change less than a pixel; the
+# series are long and are redrawn on every span selection
+plt.rcParams['path.simplify'] = True
+plt.rcParams['path.simplify_threshold'] = 1.0
 
 # my modules
 import hydrocomp
 import nwispy
 import water
-import statistics
 import helpers
 
-def onselect(xmin, xmax):
+# maximum number of span selections to keep the stats of
+MAX_CACHED_SELECTIONS = 128
+
+def prefix_sum(values):
+    """ 
+    Cumulative sum of *values* with a leading zero, so the sum of values
+    between indices i and j is prefix[j] - prefix[i].
+    """ 
+    return np.concatenate(([0.0], np.cumsum(values, dtype = np.float64)))
+
+def block_stats(values):
+    """ 
+    Split *values* into blocks of about sqrt(n) values and compute the sum, 
+    maximum, and minimum of each block for range queries with range_stats(). 
+    Values after the last full block are left out of the blocks.
+    """ 
+    block_size = max(int(np.sqrt(len(values))), 1)
+    num_blocks = len(values) // block_size
+    blocks = values[:num_blocks * block_size].reshape(num_blocks, block_size)
+    
+    return {'values': values,
+            'block_size': block_size,
+            'sum': blocks.sum(axis = 1, dtype = np.float64),
+            'max': blocks.max(axis = 1),
+            'min': blocks.min(axis = 1)
+            }
+
+def range_stats(blocks, start_idx, end_idx):
+    """ 
+    Compute the mean, maximum, and minimum of the values between *start_idx*
+    and *end_idx* from the stats of the whole blocks in the range plus the 
+    values of the partial blocks at either end.
+    """ 
+    values = blocks['values']
+    block_size = blocks['block_size']
+    
+    # whole blocks in the range
+    first_block = (start_idx + block_size - 1) // block_size
+    last_block = min(end_idx // block_size, len(blocks['sum']))
+    
+    if first_block >= last_block:
+        selected = values[start_idx:end_idx]
+        return np.mean(selected, dtype = np.float64), np.max(selected), np.min(selected)
+    
+    head = values[start_idx:first_block * block_size]
+    tail = values[last_block * block_size:end_idx]
+    
+    total = head.sum(dtype = np.float64) + blocks['sum'][first_block:last_block].sum() + tail.sum(dtype = np.float64)
+    maximum = np.max(np.concatenate((head, blocks['max'][first_block:last_block], tail)))
+    minimum = np.min(np.concatenate((head, blocks['min'][first_block:last_block], tail)))
+    
+    return total / (end_idx - start_idx), maximum, minimum
+
+def comparison_prefix_sums(observed, modeled):
     """ 
-    A select event handler for the matplotlib SpanSelector widget.
-    Selects a min/max range of the x or y axes for a matplotlib Axes.
+    Compute the prefix sums the coefficients of a range of the *observed* and
+    *modeled* data are computed from with range_coefficients(). The sums are
+    built in double precision from the data shifted by the mean observed 
+    value; neither coefficient changes when the data is shifted, and the 
+    shift keeps the sums of squares small so the differences of the sums do
+    not cancel out the digits the coefficients depend on. Missing values are 
+    summed as zero and counted in the last row.
     """ 
-    # convert matplotlib float dates to a datetime format
-    date_min = mdates.num2date(xmin)
-    date_max = mdates.num2date(xmax) 
+    observed = np.asarray(observed, dtype = np.float64)
+    modeled = np.asarray(modeled, dtype = np.float64)
+    missing = np.isnan(observed) | np.isnan(modeled)
+    shift = observed[~missing].mean() if not missing.all() else 0.0
+    observed = np.where(missing, 0.0, observed - shift)
+    modeled = np.where(missing, 0.0, modeled - shift)
+
+    return np.vstack((prefix_sum(observed),
+                      prefix_sum(modeled),
+                      prefix_sum(observed * modeled),
+                      prefix_sum(observed**2),
+                      prefix_sum(modeled**2),
+                      prefix_sum((observed - modeled)**2),
+                      prefix_sum(missing)))
+
+def range_coefficients(prefix_sums, start_idx, end_idx):
+    """ 
+    Compute the coefficient of determination and the Nash-Sutcliffe 
+    coefficient of the data between *start_idx* and *end_idx* from the 
+    differences of the comparison_prefix_sums() at the ends of the range. A 
+    range holding a missing value gets nan just like computing the 
+    coefficients over the range of the arrays would.
+    """ 
+    n = float(end_idx - start_idx)
+    sum_o, sum_m, sum_om, sum_oo, sum_mm, sum_diff2, nan_count = prefix_sums[:, end_idx] - prefix_sums[:, start_idx]
+    if nan_count > 0:
+        return np.nan, np.nan
     
-    # put the xmin and xmax in datetime format to compare
-    date_min = datetime.datetime(date_min.year, date_min.month, date_min.day, date_min.hour, date_min.minute)    
-    date_max = datetime.datetime(date_max.year, date_max.month, date_max.day, date_max.hour, date_max.minute)
+    r_squared_coeff = (n * sum_om - sum_o * sum_m)**2 / ((n * sum_mm - sum_m**2) * (n * sum_oo - sum_o**2))
+    nash_sutcliffe_coeff = 1 - sum_diff2 / (sum_oo - sum_o**2 / n)
     
-    # find the indices that were selected    
-    indices = np.where((comp_data['dates'] >= date_min) & (comp_data['dates'] <= date_max))
-    indices = indices[0]
+    return r_squared_coeff, nash_sutcliffe_coeff
+
+def plot_interactive(comp_data):
+    """ 
+    Plot the observed and modeled data and the relative error in an 
+    interactive figure. The left plots show the whole comparison; a span 
+    selected on the top left plot with the SpanSelector widget is shown in
+    the right plots along with its stats.
     
-    # set the data in ax2 plot
-    plot2a.set_data(comp_data['dates'][indices], comp_data['observed_parameter'][indices])
-    plot2b.set_data(comp_data['dates'][indices], comp_data['modeled_parameter'][indices])
+    *Parameters:*
+        comp_data : dictionary holding information, data, and statistics
         
-    # calculate updated stats 
-    updated_r_squared_coeff = statistics.r_squared(modeled = comp_data['modeled_parameter'][indices], observed = comp_data['observed_parameter'][indices])
-    updated_nash_sutcliffe_coeff = statistics.nash_sutcliffe(modeled = comp_data['modeled_parameter'][indices], observed = comp_data['observed_parameter'][indices])
+    *Return:*
+        no returns
+    """ 
+    # precompute prefix sums once so the stats of any span selection are 
+    # a few lookups instead of a pass over the selected data
+    prefix_sums = comparison_prefix_sums(comp_data['observed_parameter'], comp_data['modeled_parameter'])
+
+    # single precision is plenty for plotting and for the max, min, and mean
+    # shown on the plots, and halves the memory the span selection reads
+    comp_data['observed_parameter'] = np.ascontiguousarray(comp_data['observed_parameter'], dtype = np.float32)
+    comp_data['modeled_parameter'] = np.ascontiguousarray(comp_data['modeled_parameter'], dtype = np.float32)
+    comp_data['stats']['relative_error'] = np.ascontiguousarray(comp_data['stats']['relative_error'], dtype = np.float32)
+
+    # keep the arrays used by onselect in names of their own instead of 
+    # looking them up in comp_data on every selection
+    observed_data = comp_data['observed_parameter']
+    modeled_data = comp_data['modeled_parameter']
+    relative_error_data = comp_data['stats']['relative_error']
+
+    # convert the dates once to matplotlib float date numbers; onselect
+    # gets the span as float date numbers and plots with them
+    date_nums = mdates.date2num(comp_data['dates'])
+
+    # precompute block stats of the relative error for the mean, max, and
+    # min of a span selection
+    relative_error_blocks = block_stats(relative_error_data)
+
+    # stats of recent span selections keyed by their range of indices from 
+    # the least to the most recently used, and the range of the last selection
+    selection_cache = OrderedDict()
+    last_selection = [None]
+
+    # figure background saved on each full draw for blitting
+    background = [None]
+
+    # plot 
+    fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(nrows = 2, ncols= 2, figsize = (20, 12))
+
+    # the left plots show the whole comparison and the right plots show the 
+    # span selection; all plots share the title
+    title = '%s vs. %s (%s)' % (comp_data['model_name'], comp_data['observed_name'], comp_data['timestep'])
     
-    ax2.set_xlim(comp_data['dates'][indices][0], comp_data['dates'][indices][-1])
-    param_max = np.max((comp_data['observed_parameter'][indices], comp_data['modeled_parameter'][indices]))
-    param_min = np.min((comp_data['observed_parameter'][indices], comp_data['modeled_parameter'][indices]))
-    ax2.set_ylim(param_min, param_max)
+    parameter_series = [
+        (observed_data, {'color': 'b', 'label': comp_data['observed_name']}),
+        (modeled_data, {'color': 'g', 'label': comp_data['model_name']})
+        ]
+    error_series = [(relative_error_data, {'color': 'r', 'label': 'relative error'})]
     
-    # show text of mean, max, min values on graph; use matplotlib.patch.Patch properies and bbox
-    text2 = 'R_squared = %.2f\nNash sutcliffe = %.2f' % (updated_r_squared_coeff, updated_nash_sutcliffe_coeff)
-                   
-    ax2_text.set_text(text2)
+    # show text on graph of the coefficients and the mean, max, min values
+    coeff_text = 'R_squared = %.2f\nNash-Sutcliffe = %.2f' % (comp_data['stats']['r_squared_coeff'], comp_data['stats']['nash_sutcliffe_coeff'])
+    error_text = 'Mean = %.2f\nMax = %.2f\nMin = %.2f' % (np.mean(relative_error_data), np.max(relative_error_data), np.min(relative_error_data))
+    
+    hydrocomp.plot_series(ax1, comp_data['dates'], parameter_series, title, comp_data['parameter_name'], coeff_text)
+    (plot2a, plot2b), ax2_text = hydrocomp.plot_series(ax2, comp_data['dates'], parameter_series, title, comp_data['parameter_name'], coeff_text)
+    # the reference lines at zero are horizontal lines across each axes, so 
+    # they need no data of their own and no update on a span selection
+    hydrocomp.plot_series(ax3, comp_data['dates'], error_series, title, 'relative error', error_text, reference_line = True)
+    (plot4,), ax4_text = hydrocomp.plot_series(ax4, comp_data['dates'], error_series, title, 'relative error', error_text, reference_line = True)
+
+    # event handlers; closures over the data and artists above
+    def onselect(xmin, xmax):
+        """ 
+        A select event handler for the matplotlib SpanSelector widget.
+        Selects a min/max range of the x or y axes for a matplotlib Axes.
+        """ 
+        # find the range of indices that were selected; xmin and xmax are 
+        # matplotlib float dates, so search the float date numbers directly; dates
+        # are sorted so use a binary search and slice the arrays instead of 
+        # building boolean masks
+        start_idx = np.searchsorted(date_nums, xmin, side = 'left')
+        end_idx = np.searchsorted(date_nums, xmax, side = 'right')
+        selected = slice(start_idx, end_idx)
     
-    # set the data in ax4 plot
-    plot4a.set_data(comp_data['dates'][indices], comp_data['stats']['relative_error'][indices])
-    plot4b.set_data(comp_data['dates'][indices], comp_data['stats']['relative_error'][indices])
+        # a repeated selection of the same range has nothing to update
+        if last_selection[0] == (start_idx, end_idx):
+            return
+    
+        last_selection[0] = (start_idx, end_idx)
+    
+        # the stats only depend on the selected range of indices, so reuse the 
+        # stats of a range that was selected before
+        key = (start_idx, end_idx)
+        if key in selection_cache:
+            # move the selection to the most recently used end
+            selection_cache[key] = selection_cache.pop(key)
+        else:
+            # drop the least recently used selection
+            if len(selection_cache) >= MAX_CACHED_SELECTIONS:
+                selection_cache.popitem(last = False)
+            selection_cache[key] = selection_stats(start_idx, end_idx)
     
-    # calculate updated mean, max, min for stats data
-    stat_mean = np.mean(comp_data['stats']['relative_error'][indices])
-    stat_max = np.max(comp_data['stats']['relative_error'][indices])
-    stat_min = np.min(comp_data['stats']['relative_error'][indices])
+        stats = selection_cache[key]
     
-    ax4.set_xlim(comp_data['dates'][indices][0], comp_data['dates'][indices][-1])
-    ax4.set_ylim(stat_min, stat_max)
+        # slices are views of the full arrays, so nothing is copied here
+        selected_dates = date_nums[selected]
+        relative_error = relative_error_data[selected]
     
-    # show text of mean, max, min values on graph; use matplotlib.patch.Patch properies and bbox
-    text4 = 'Mean = %.2f\nMax = %.2f\nMin = %.2f' % (stat_mean, stat_max, stat_min)
+        # set the data in ax2 plot
+        plot2a.set_data(selected_dates, observed_data[selected])
+        plot2b.set_data(selected_dates, modeled_data[selected])
+    
+        ax2.set_xlim(selected_dates[0], selected_dates[-1])
+        ax2.set_ylim(stats['param_min'], stats['param_max'])
+    
+        # show text of mean, max, min values on graph; use matplotlib.patch.Patch properies and bbox
+        text2 = 'R_squared = %.2f\nNash sutcliffe = %.2f' % (stats['r_squared_coeff'], stats['nash_sutcliffe_coeff'])
+                   
+        ax2_text.set_text(text2)
+    
+        # set the data in ax4 plot
+        plot4.set_data(selected_dates, relative_error)
+    
+        ax4.set_xlim(selected_dates[0], selected_dates[-1])
+        ax4.set_ylim(stats['stat_min'], stats['stat_max'])
+    
+        # show text of mean, max, min values on graph; use matplotlib.patch.Patch properies and bbox
+        text4 = 'Mean = %.2f\nMax = %.2f\nMin = %.2f' % (stats['stat_mean'], stats['stat_max'], stats['stat_min'])
                    
-    ax4_text.set_text(text4)    
+        ax4_text.set_text(text4)    
+    
+        # redraw only the updated axes over the saved figure background instead
+        # of redrawing the whole figure
+        fig.canvas.restore_region(background[0])
+        draw_selection_axes()
+
+    def selection_stats(start_idx, end_idx):
+        """ 
+        Compute the stats shown for a span selection of the values between 
+        *start_idx* and *end_idx*. Returns a dictionary of the stats.
+        """ 
+        observed_parameter = observed_data[start_idx:end_idx]
+        modeled_parameter = modeled_data[start_idx:end_idx]
+    
+        # calculate updated stats from the differences of the prefix sums at the
+        # ends of the selection
+        r_squared_coeff, nash_sutcliffe_coeff = range_coefficients(prefix_sums, start_idx, end_idx)
+    
+        # calculate updated mean, max, min for stats data from the block stats
+        stat_mean, stat_max, stat_min = range_stats(relative_error_blocks, start_idx, end_idx)
+        
+        # reduce each array on its own instead of stacking them into a new
+        # array; np.maximum and np.minimum keep a nan from either array
+        param_max = np.maximum(observed_parameter.max(), modeled_parameter.max())
+        param_min = np.minimum(observed_parameter.min(), modeled_parameter.min())
+    
+        stats = {'r_squared_coeff': r_squared_coeff,
+                 'nash_sutcliffe_coeff': nash_sutcliffe_coeff,
+                 'param_max': param_max,
+                 'param_min': param_min,
+                 'stat_mean': stat_mean,
+                 'stat_max': stat_max,
+                 'stat_min': stat_min
+                 }
     
-    fig.canvas.draw()
+        return stats
 
-def toggle_selector(event):
+    def draw_selection_axes():
+        """ 
+        Draw the axes updated by the SpanSelector widget and blit them to the
+        screen. The axes are animated, so a full figure draw leaves them out.
+        """ 
+        fig.draw_artist(ax2)
+        fig.draw_artist(ax4)
+        fig.canvas.blit(fig.bbox)
+
+    def on_draw(event):
+        """ 
+        A draw event handler for the figure. Saves the figure background without
+        the animated axes, then draws the animated axes on top of it.
+        """ 
+        background[0] = fig.canvas.copy_from_bbox(fig.bbox)
+        draw_selection_axes()
+
+    def toggle_selector(event):
+        """ 
+        A toggle key event handler for the matplotlib SpanSelector widget.
+        A or a actives the slider; Q or q de-activates the slider.
+        """ 
+        if event.key in ['Q', 'q'] and span.visible:
+            print '**SpanSelector deactivated.**'
+            span.visible = False
+        if event.key in ['A', 'a'] and not span.visible:
+            print '**SpanSelector activated.**'
+            span.visible = True
+
+    # make a splan selector and have it turned off initially until user 
+    # presses 'q' or 'a' on the key board via toggle_selector
+    span = SpanSelector(ax1, onselect, 'horizontal', useblit=True,
+                        rectprops=dict(alpha=0.5, facecolor='red'))
+    span.visible = False
+
+    # connect span with the toggle selector in order to toggle span selector on and off
+    span.connect_event('key_press_event', toggle_selector)        
+
+    # animate the axes updated by the span selector so a selection blits
+    # only those axes over a background saved after each full draw
+    ax2.set_animated(True)
+    ax4.set_animated(True)
+    fig.canvas.mpl_connect('draw_event', on_draw)
+
+    # make sure that the layout of the subplots do not overlap
+    plt.tight_layout()
+    plt.show()
+
+def main():
     """ 
-    A toggle key event handler for the matplotlib SpanSelector widget.
-    A or a actives the slider; Q or q de-activates the slider.
+    Run as script. Prompt user for observed and model file. Process each file,
+    print information, and plot an interactive comparison of the data.
     """ 
-    if event.key in ['Q', 'q'] and span.visible:
-        print '**SpanSelector deactivated.**'
-        span.visible = False
-    if event.key in ['A', 'a'] and not span.visible:
-        print '**SpanSelector activated.**'
-        span.visible = True
-
+    # the dialog modules are only needed when the module is run as a script, 
+    # so they are imported here; importing the module for its functions does
+    # not load them
+    import Tkinter, tkFileDialog
     
- # get user input about which parameter to compare
-print ''
-print '** User Input **'
-observed_name = raw_input('What is a descriptive name for the *OBSERVED* data? ')
-        
-# get observed file    
-root = Tkinter.Tk() 
-file_format = [('Text file','*.txt')]  
-nwis_file = tkFileDialog.askopenfilename(title = 'Select *OBSERVED* File', filetypes = file_format)
-root.destroy()
-
-# get user input about which parameter to compare
-print ''
-print '** User Input **'
-model_name = raw_input('What is a descriptive name for the *MODEL* data file? ')
+    # create one hidden root window shared by both file dialogs
+    root = Tkinter.Tk() 
+    root.withdraw()
+    file_format = [('Text file','*.txt')]  
+
+    # get user input about which parameter to compare
+    print ''
+    print '** User Input **'
+    observed_name = raw_input('What is a descriptive name for the *OBSERVED* data? ')
         
-# get modeled file    
-root = Tkinter.Tk() 
-file_format = [('Text file','*.txt')]  
-water_file = tkFileDialog.askopenfilename(title = 'Select *MODEL* output File', filetypes = file_format)
-root.destroy()
+    # get observed file    
+    nwis_file = tkFileDialog.askopenfilename(parent = root, title = 'Select *OBSERVED* File', filetypes = file_format)
 
-if nwis_file and water_file:
+    # get user input about which parameter to compare
+    print ''
+    print '** User Input **'
+    model_name = raw_input('What is a descriptive name for the *MODEL* data file? ')
+        
+    # get modeled file    
+    water_file = tkFileDialog.askopenfilename(parent = root, title = 'Select *MODEL* output File', filetypes = file_format)
+    root.destroy()
+
+    if nwis_file and water_file:
     
-    try:
-        # process observed file  
-        print ''
-        print '** Processing Observed Data **'
-        print nwis_file
-        nwis_data = nwispy.read_nwis(nwis_file)
-        
-        # print observed information
-        print ''
-        print '** Observed File Information **'
-        nwispy.print_nwis(nwis_data = nwis_data)
-        
-        # process modeled file
-        print ''
-        print '** Processing Modeled Data **'
-        print water_file
-        water_data = water.read_water(water_file)
-        
-        # print modeled information
-        print ''
-        print '** Modeled File Information **'
-        water.print_water(water_data = water_data)
-        
-        # get user input about which parameter to compare
-        print ''
-        print '** User Input **'
-        user_parameter = raw_input('What common parameter would you like to compare? ')            
-        
-        # print the parameter being compared
-        print ''
-        print '** Parameter Being Compared **'
-        print user_parameter            
-        
-        # get parameter from observed file        
-        for parameter in nwis_data['parameters']:
-            if user_parameter in parameter['description'].lower():
-                nwis_parameter = parameter['data']                
+        try:
+            # process observed and modeled files at the same time
+            print ''
+            print '** Processing Observed Data **'
+            print nwis_file
+            print ''
+            print '** Processing Modeled Data **'
+            print water_file
+            nwis_data, water_data = hydrocomp.read_files(nwis_file, water_file)
+        
+            # print observed information
+            print ''
+            print '** Observed File Information **'
+            nwispy.print_nwis(nwis_data = nwis_data)
+        
+            # print modeled information
+            print ''
+            print '** Modeled File Information **'
+            water.print_water(water_data = water_data)
+        
+            # get user input about which parameter to compare
+            print ''
+            print '** User Input **'
+            user_parameter = raw_input('What common parameter would you like to compare? ')            
+        
+            # print the parameter being compared
+            print ''
+            print '** Parameter Being Compared **'
+            print user_parameter            
+        
+            # get parameter from observed file; use the first parameter whose
+            # description contains the user parameter
+            nwis_parameter = next((parameter['data'] for parameter in nwis_data['parameters'] 
+                                   if user_parameter in parameter['description'].lower()), None)
+            if nwis_parameter is None:
+                raise ValueError(user_parameter + ' parameter does not exist in observed file')
+        
+            # get parameter from modeled file
+            if user_parameter in water_data:
+                water_parameter = water_data[user_parameter]
             else:
-                print user_parameter + ' parameter does not exist in observed file'                    
-        
-        # get parameter from modeled file
-        if user_parameter in water_data.keys():
-            water_parameter = water_data[user_parameter]
-        else:
-            print user_parameter + ' parameter does not exist in model file'  
+                raise ValueError(user_parameter + ' parameter does not exist in model file')
         
-        # subset modeled data and the observed data by finding common date range
-        # find common start date and end date between the data sets
-        start_date, end_date = helpers.find_start_end_dates(model_dates = water_data['date'], observed_dates = nwis_data['dates'])
+            # subset modeled data and the observed data by finding common date range
+            # find common start date and end date between the data sets
+            start_date, end_date = helpers.find_start_end_dates(model_dates = water_data['date'], observed_dates = nwis_data['dates'])
         
-        # subset the water data to match the range of the nwis data
-        subset_kwargs = {
-            'dates': water_data['date'],
-            'data': water_parameter,
-            'start_date': start_date,
-            'end_date': end_date
-            }
-            
-        water_data_subset = helpers.subset_data(**subset_kwargs)    
-        
-        # subset the water data to match the range of the nwis data
-        subset_kwargs = {
-            'dates': nwis_data['dates'],
-            'data': nwis_parameter,
-            'start_date': start_date,
-            'end_date': end_date
-            }
-            
-        nwis_data_subset = helpers.subset_data(**subset_kwargs) 
-
-        # compare parameters and compute stats           
-        compare_kwargs = {
-            'parameter_name': user_parameter,
-            'model_name': model_name,
-            'observed_name': observed_name,
-            'modeled_parameter': water_data_subset['data'],
-            'observed_parameter': nwis_data_subset['data'],
-            'dates': nwis_data_subset['dates']
-            }
+            # subset the water data and the nwis data to the common date range; the
+            # subsets are views of the data, not copies
+            water_data_subset = helpers.subset_data(dates = water_data['date'], data = water_parameter, start_date = start_date, end_date = end_date)
+            nwis_data_subset = helpers.subset_data(dates = nwis_data['dates'], data = nwis_parameter, start_date = start_date, end_date = end_date)
+
+            # compare parameters and compute stats           
+            compare_kwargs = {
+                'parameter_name': user_parameter,
+                'model_name': model_name,
+                'observed_name': observed_name,
+                'modeled_parameter': water_data_subset.data,
+                'observed_parameter': nwis_data_subset.data,
+                'dates': nwis_data_subset.dates
+                }
           
-        comp_data = hydrocomp.compare(**compare_kwargs)
+            comp_data = hydrocomp.compare(**compare_kwargs)
 
-        # print results
-        hydrocomp.print_comp_data(comp_data = comp_data)
+            # print results
+            hydrocomp.print_comp_data(comp_data = comp_data)
 
-        # plot 
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(nrows = 2, ncols= 2, figsize = (20, 12))
+            # plot
+            plot_interactive(comp_data = comp_data)
 
-        # ax1 plot
-        ax1.grid(True)
-        
-        ax1.set_title(comp_data['model_name'] + ' vs. ' + comp_data['observed_name'] + ' (' + comp_data['timestep'].__str__() +')')
-        ax1.set_xlabel('date')
-        ax1.set_ylabel(comp_data['parameter_name'])
-    
-        plot1a, = ax1.plot(comp_data['dates'], comp_data['observed_parameter'], color = 'b', label = comp_data['observed_name'])
-        plot1b, = ax1.plot(comp_data['dates'], comp_data['modeled_parameter'], color = 'g', label = comp_data['model_name'])
-        
-        # rotate and align the tick labels so they look better   
-        plt.setp(ax1.xaxis.get_majorticklabels(), rotation = 30)
-        
-        # use a more precise date string for the x axis locations in the
-        # toolbar
-        ax1.fmt_xdata = mdates.DateFormatter('%Y-%m-%d')
-         
-        # legend; make it transparent    
-        handles, labels = ax1.get_legend_handles_labels()
-        legend = ax1.legend(handles, labels, fancybox = True)
-        legend.get_frame().set_alpha(0.5)
-        legend.draggable(state=True)
-        
-        # show text on graph; use matplotlib.patch.Patch properies and bbox
-        text1 = 'R_squared = %.2f\nNash-Sutcliffe = %.2f' % (comp_data['stats']['r_squared_coeff'], comp_data['stats']['nash_sutcliffe_coeff'])
-        patch_properties = {'boxstyle': 'round',
-                            'facecolor': 'wheat',
-                            'alpha': 0.5
-                            }
-                       
-        ax1.text(0.05, 0.95, text1, transform = ax1.transAxes, fontsize = 14, 
-                verticalalignment = 'top', horizontalalignment = 'left', bbox = patch_properties)
-        
-        # ax2 plot
-        ax2.grid(True)
-        ax2.set_title(comp_data['model_name'] + ' vs. ' + comp_data['observed_name'] + ' (' + comp_data['timestep'].__str__() +')')
-        ax2.set_xlabel('date')
-        ax2.set_ylabel(comp_data['parameter_name'])
-    
-        plot2a, = ax2.plot(comp_data['dates'], comp_data['observed_parameter'], color = 'b', label = comp_data['observed_name'])
-        plot2b, = ax2.plot(comp_data['dates'], comp_data['modeled_parameter'], color = 'g', label = comp_data['model_name'])
-        
-        # rotate and align the tick labels so they look better 
-        plt.setp(ax2.xaxis.get_majorticklabels(), rotation = 30)
-        
-        # use a more precise date string for the x axis locations in the
-        # toolbar
-        ax2.fmt_xdata = mdates.DateFormatter('%Y-%m-%d')
-         
-        # legend; make it transparent    
-        handles, labels = ax2.get_legend_handles_labels()
-        legend = ax2.legend(handles, labels, fancybox = True)
-        legend.get_frame().set_alpha(0.5)
-        legend.draggable(state=True)
-        
-        # show text on graph; use matplotlib.patch.Patch properies and bbox
-        text2 = 'R_squared = %.2f\nNash-Sutcliffe = %.2f' % (comp_data['stats']['r_squared_coeff'], comp_data['stats']['nash_sutcliffe_coeff'])
-        patch_properties = {'boxstyle': 'round',
-                            'facecolor': 'wheat',
-                            'alpha': 0.5
-                            }
-                       
-        ax2_text = ax2.text(0.05, 0.95, text2, transform = ax2.transAxes, fontsize = 14, 
-                            verticalalignment = 'top', horizontalalignment = 'left', bbox = patch_properties)
-        
-        
-        # plot the stats in ax3 and ax4       
-        ax3.grid(True)
-        ax3.set_title(comp_data['model_name'] + ' vs. ' + comp_data['observed_name'] + ' (' + comp_data['timestep'].__str__() +')')
-        ax3.set_xlabel('date')
-        ax3.set_ylabel('relative error')
-    
-        plot3a, = ax3.plot(comp_data['dates'], np.zeros(len(comp_data['dates'])), color = 'k', linestyle = '--', label = 'reference line')
-        plot3b, = ax3.plot(comp_data['dates'], comp_data['stats']['relative_error'], color = 'r', label = 'relative error')
-        
-        # rotate and align the tick labels so they look better 
-        plt.setp(ax3.xaxis.get_majorticklabels(), rotation = 30)
-        
-        # use a more precise date string for the x axis locations in the
-        # toolbar
-        ax3.fmt_xdata = mdates.DateFormatter('%Y-%m-%d')
-         
-        # legend; make it transparent    
-        handles, labels = ax3.get_legend_handles_labels()
-        legend = ax3.legend(handles, labels, fancybox = True)
-        legend.get_frame().set_alpha(0.5)
-        legend.draggable(state=True)
-        
-        # show text on graph; use matplotlib.patch.Patch properies and bbox
-        text3 = 'Mean = %.2f\nMax = %.2f\nMin = %.2f' % (np.mean(comp_data['stats']['relative_error']), np.max(comp_data['stats']['relative_error']), np.min(comp_data['stats']['relative_error']))
-        patch_properties = {'boxstyle': 'round',
-                            'facecolor': 'wheat',
-                            'alpha': 0.5
-                            }
-                       
-        ax3_text = ax3.text(0.05, 0.95, text3, transform = ax3.transAxes, fontsize = 14, 
-                            verticalalignment = 'top', horizontalalignment = 'left', bbox = patch_properties)
-        
-        # ax4 plot
-        ax4.grid(True)
-        ax4.set_title(comp_data['model_name'] + ' vs. ' + comp_data['observed_name'] + ' (' + comp_data['timestep'].__str__() +')')
-        ax4.set_xlabel('date')
-        ax4.set_ylabel('relative error')
-    
-        plot4a, = ax4.plot(comp_data['dates'], np.zeros(len(comp_data['dates'])), color = 'k', linestyle = '--', label = 'reference line')
-        plot4b, = ax4.plot(comp_data['dates'], comp_data['stats']['relative_error'], color = 'r', label = 'relative error')
-        
-        # rotate and align the tick labels so they look better 
-        plt.setp(ax4.xaxis.get_majorticklabels(), rotation = 30)
-        
-        # use a more precise date string for the x axis locations in the
-        # toolbar
-        ax4.fmt_xdata = mdates.DateFormatter('%Y-%m-%d')
-         
-        # legend; make it transparent    
-        handles, labels = ax4.get_legend_handles_labels()
-        legend = ax4.legend(handles, labels, fancybox = True)
-        legend.get_frame().set_alpha(0.5)
-        legend.draggable(state=True)
-        
-        # show text on graph; use matplotlib.patch.Patch properies and bbox
-        text4 = 'Mean = %.2f\nMax = %.2f\nMin = %.2f' % (np.mean(comp_data['stats']['relative_error']), np.max(comp_data['stats']['relative_error']), np.min(comp_data['stats']['relative_error']))
-        patch_properties = {'boxstyle': 'round',
-                            'facecolor': 'wheat',
-                            'alpha': 0.5
-                            }
-                       
-        ax4_text = ax4.text(0.05, 0.95, text4, transform = ax4.transAxes, fontsize = 14, 
-                            verticalalignment = 'top', horizontalalignment = 'left', bbox = patch_properties)        
-        
-        
-        # make a splan selector and have it turned off initially until user 
-        # presses 'q' or 'a' on the key board via toggle_selector
-        span = SpanSelector(ax1, onselect, 'horizontal', useblit=True,
-                            rectprops=dict(alpha=0.5, facecolor='red'))
-        span.visible = False
-                
-        # connect span with the toggle selector in order to toggle span selector on and off
-        span.connect_event('key_press_event', toggle_selector)        
-        
-        # make sure that the layout of the subplots do not overlap
-        plt.tight_layout()
-        plt.show()
-                
-    except IOError as error:
-        print 'cannot read file' + error.filename
-        print error.message
-
-    except IndexError as error:
-        print 'Cannot read file! Bad file!'
-        print error.message
+        except IOError as error:
+            print 'cannot read file' + error.filename
+            print error.message
+
+        except IndexError as error:
+            print 'Cannot read file! Bad file!'
+            print error.message
     
-    except ValueError as error:
-        print error.message
+        except ValueError as error:
+            print error.message
         
-else:
-    print '** Canceled **'
- 
\ No newline at end of file
+    else:
+        print '** Canceled **'
+
+if __name__ == '__main__':
+    main()
@@ -15,7 +15,6 @@ import sys
 import re
 import numpy as np
 import datetime
-import Tkinter, tkFileDialog
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import logging
@@ -96,12 +95,14 @@ def read_nwis_in(filestream):
     # column_names and data_row patterns have 5 groups which is used to 
     # distinguish a daily file from an instanteous file; if 4th group is None, 
     # then data file is daily, otherwise it is an instanteous file.
+    # The patterns are compiled once here so each line of the file does not 
+    # look them up again in the regular expression cache.
     patterns = {
-        'date_retrieved': '(.+): (.{4}-.{2}-.{2}) (.{2}:.{2}:.{2}) (.+)', 
-        'gage_name': '(#.+)(USGS.+)',
-        'parameters': '(#)\D+([0-9]{2})\D+([0-9]{5})(\D+[0-9]{5})?(.+)',
-        'column_names': '(agency_cd)\t(site_no)\t(datetime)\t(tz_cd)?(.+)',
-        'data_row': '(USGS)\t([0-9]{8})\t([0-9]{4}-[0-9]{1,2}-[0-9]{1,2})\s?([0-9]{2}:[0-9]{2}\t[A-Z]{3})?(.+)'
+        'date_retrieved': re.compile('(.+): (.{4}-.{2}-.{2}) (.{2}:.{2}:.{2}) (.+)'), 
+        'gage_name': re.compile('(#.+)(USGS.+)'),
+        'parameters': re.compile('(#)\D+([0-9]{2})\D+([0-9]{5})(\D+[0-9]{5})?(.+)'),
+        'column_names': re.compile('(agency_cd)\t(site_no)\t(datetime)\t(tz_cd)?(.+)'),
+        'data_row': re.compile('(USGS)\t([0-9]{8})\t([0-9]{4}-[0-9]{1,2}-[0-9]{1,2})\s?([0-9]{2}:[0-9]{2}\t[A-Z]{3})?(.+)')
     }    
     
     # initialize a dictionary to hold all the data of interest
@@ -117,11 +118,11 @@ def read_nwis_in(filestream):
     # process file
     for line in data_file: 
         # find match
-        match_date_retrieved = re.search(pattern = patterns['date_retrieved'], string = line)
-        match_gage_name = re.search(pattern = patterns['gage_name'], string = line)
-        match_parameters = re.search(pattern = patterns['parameters'], string = line)
-        match_column_names = re.search(pattern = patterns['column_names'], string = line)
-        match_data_row = re.search(pattern = patterns['data_row'], string = line)
+        match_date_retrieved = patterns['date_retrieved'].search(string = line)
+        match_gage_name = patterns['gage_name'].search(string = line)
+        match_parameters = patterns['parameters'].search(string = line)
+        match_column_names = patterns['column_names'].search(string = line)
+        match_data_row = patterns['data_row'].search(string = line)
      
         # if match is found add it to data dictionary; date is in second group of the match
         if match_date_retrieved:
@@ -157,8 +158,10 @@ def read_nwis_in(filestream):
             date = get_date(daily = match_data_row.group(3), instantaneous = match_data_row.group(4))
             data['dates'].append(date)
             
+            # split the row once and index it for each parameter
+            fields = match_data_row.group(0).split('\t')
             for parameter in data['parameters']:
-                value = match_data_row.group(0).split('\t')[parameter['index']]
+                value = fields[parameter['index']]
                 
                 if not is_float(value):
                     if value == "":
@@ -191,9 +194,10 @@ def read_nwis_in(filestream):
         data['timestep'] = 'instantaneous'
     
     # convert each parameter data list in data['parameter'] convert to a numpy array and
-    # compute mean, max, and min as well.
+    # compute mean, max, and min as well. The values are already floats, so fill
+    # a preallocated float64 array instead of letting numpy infer the dtype.
     for parameter in data['parameters']:
-        parameter['data'] = np.array(parameter['data'])
+        parameter['data'] = np.fromiter(parameter['data'], dtype = np.float64, count = len(parameter['data']))
         parameter['mean'] = np.mean(parameter['data'])
         parameter['max'] = np.max(parameter['data'])
         parameter['min'] = np.min(parameter['data'])
@@ -392,6 +396,11 @@ def main():
     
     """ 
     
+    # the dialog modules are only needed when the module is run as a script, 
+    # so they are imported here; importing the module for its functions does
+    # not load them
+    import Tkinter, tkFileDialog
+    
     # open a file dialog to get file     
     root = Tkinter.Tk() 
     file_format = [('Text file','*.txt')]  
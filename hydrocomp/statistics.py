@@ -21,6 +21,41 @@ Calculate the following statistics:
 
 import numpy as np
 
+# my modules
+import helpers
+
+def _scaled_relative_error(x, x_true, scale = 1, out = None):
+    """
+    Compute the relative error between two arrays times *scale* in a single 
+    output array; each step writes into *out* instead of a new temporary 
+    array. A new output array is allocated when *out* is None.
+    
+    *Parameters:*    
+        x : array of data
+        
+        x_true : array of true data 
+        
+        scale : value to multiply the relative error by
+        
+        out : array to hold the result
+    
+    *Return:*
+        error : array of scaled relative error
+    
+    """
+    x = np.asarray(x)
+    x_true = np.asarray(x_true)
+    
+    if out is None:
+        out = np.empty(np.broadcast(x, x_true).shape, dtype = np.result_type(x, x_true, 1.0))
+    
+    np.subtract(x, x_true, out = out)
+    np.divide(out, x_true, out = out)
+    if scale != 1:
+        np.multiply(out, scale, out = out)
+    
+    return out
+
 def absolute_error(x, x_true):
     """
     Compute the absolute error between two arrays 
@@ -79,7 +114,8 @@ def mean_squared_error(x, x_true):
     # compute error
     error = absolute_error(x, x_true)
     
-    mse = np.mean(error**2)
+    # the dot product sums the squared errors without a temporary array
+    mse = float(np.dot(error, error)) / error.size
     
     return mse
 
@@ -109,8 +145,8 @@ def relative_error(x, x_true):
     
     """
     
-    # compute percent error
-    error = absolute_error(x, x_true) / x_true
+    # compute relative error
+    error = _scaled_relative_error(x, x_true)
     
     return error
 
@@ -141,7 +177,7 @@ def percent_error(x, x_true):
     """ 
     
     # compute percent error
-    error = relative_error(x, x_true) * 100
+    error = _scaled_relative_error(x, x_true, scale = 100)
     
     return error
 
@@ -171,17 +207,17 @@ def percent_difference(x, x_true):
 
     """ 
     
-    # compute percent difference
-    avg = np.average((x, x_true), axis = 0)
-    
-    percent_diff = ((x - x_true)/avg) * 100
+    # compute percent difference; the average of x and x_true is computed 
+    # directly instead of stacking them into an array to average
+    percent_diff = ((x - x_true) / ((x + x_true) / 2.0)) * 100
     
     return percent_diff
 
 def r_squared(modeled, observed):
     """  
     Compute the Coefficient of Determination. Used to indicate how well
-    data points fit a line or curve. Use numpy.coeff for computation.
+    data points fit a line or curve. Computed as the square of the Pearson
+    correlation coefficient from dot products of the deviations from the mean.
                         
     *Parameters:*   
         modeled : array of modeled values
@@ -206,9 +242,15 @@ def r_squared(modeled, observed):
 
     """     
     
-    r = np.corrcoef(modeled, observed)[0, 1]
+    modeled = np.asarray(modeled)
+    observed = np.asarray(observed)
+    
+    # deviations from the mean values
+    modeled_deviation = modeled - modeled.mean()
+    observed_deviation = observed - observed.mean()
     
-    coefficient = r**2    
+    # square of r = sxy / sqrt(sxx * syy); squaring directly skips the sqrt
+    coefficient = np.dot(modeled_deviation, observed_deviation)**2 / (np.dot(modeled_deviation, modeled_deviation) * np.dot(observed_deviation, observed_deviation))
     
     return coefficient
 
@@ -242,18 +284,62 @@ def nash_sutcliffe(modeled, observed):
 
     """     
     
-    # compute mean value of the observed array
-    mean_observed = np.mean(observed)
-
-    # compute numerator and denominator
-    numerator = sum((observed - modeled) ** 2)
-    denominator = sum((observed - mean_observed)**2)
+    observed = np.asarray(observed)
+    modeled = np.asarray(modeled)
+    
+    # compute numerator and denominator; the dot product sums the squared 
+    # differences without a temporary array of squares, and the sum of squared
+    # deviations from the mean is the variance times the number of values
+    difference = observed - modeled
+    numerator = np.dot(difference, difference)
+    denominator = observed.size * observed.var()
 
     # compute coefficient
-    coefficient = 1 - (numerator/denominator)
+    # divide in double precision; the sums of single precision arrays are 
+    # single precision and their ratio loses digits when it is close to one.
+    # Dividing numpy scalars keeps the -inf or nan of observed data that does
+    # not vary instead of raising ZeroDivisionError
+    coefficient = 1 - (np.float64(numerator) / np.float64(denominator))
     
     return coefficient
 
+def nse_and_r2(modeled, observed):
+    """   
+    Compute the Nash-Sutcliffe coefficient and the Coefficient of 
+    Determination together. If numba is installed, a compiled kernel computes 
+    the sums both coefficients need in a single pass over the data; otherwise
+    nash_sutcliffe() and r_squared() are used.
+                
+    *Parameters:*   
+        modeled : array of modeled values
+        
+        observed : array of observed value
+    
+    *Return:*
+        nash_sutcliffe_coeff : model efficiency coefficient
+        
+        r_squared_coeff : coefficient of determination
+
+    *Example:*
+
+    >>> import numpy as np
+    
+    >>> model_data = np.array([55.5, 62.1, 65.3, 64.4, 61.2])
+    
+    >>> observed_data = np.array([55.7, 62.0, 65.5, 64.7, 61.1])
+    
+    >>> nse_and_r2(modeled = model_data, observed = observed_data)
+    
+    (0.99682486631016043, 0.99768587638100936)
+
+    """     
+    _kernels = helpers.import_kernels()
+    if _kernels is not None:
+        return _kernels.nse_and_r2(np.ascontiguousarray(modeled, dtype = np.float64), 
+                                   np.ascontiguousarray(observed, dtype = np.float64))
+    
+    return nash_sutcliffe(modeled, observed), r_squared(modeled, observed)
+
 def main():
     """
     Script of computing statistics on a sample of modeled and observed data.
@@ -274,6 +360,7 @@ def main():
     print 'Percent difference: %s' % percent_difference(x = model_data, x_true = observed_data)
     print 'R squared: %s' % r_squared(modeled = model_data, observed = observed_data)
     print 'Nash-Sutcliffe: %s' % nash_sutcliffe(modeled = model_data, observed = observed_data)
+    print 'Nash-Sutcliffe and R squared: %s, %s' % nse_and_r2(modeled = model_data, observed = observed_data)
     
     
 if __name__ == "__main__":
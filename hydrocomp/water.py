@@ -13,22 +13,46 @@ by the WATER application.
 """
 
 import numpy as np
-import datetime
-import Tkinter, tkFileDialog
-import matplotlib.pyplot as plt  
+import warnings
 
-def read_water(water_file):
+# my modules
+import helpers
+
+# WATER parameter names; the date column followed by the numeric columns 
+# as pairs of water_data key and column name
+DATE_CODE = 'Date'
+NUMERIC_PARAMETERS = (
+    ('discharge', 'Discharge (cfs)'),
+    ('subsurface flow', 'Subsurface Flow (cfs)'),
+    ('impervious flow', 'Impervious Flow (mm)'),
+    ('infiltration excess', 'Infiltration Excess (mm)'),
+    ('initial abstracted flow', 'Initial Abstracted Flow (mm)'),
+    ('overland flow', 'Overland Flow (mm)'),
+    ('pet', 'PET (mm)'),
+    ('aet', 'AET(mm)'),
+    ('average soil root zone', 'Average Soil Root zone (mm)'),
+    ('average soil upper zone', 'Average Soil Upperzone (mm)'),
+    ('snow pack', 'Snow Pack (mm)'),
+    ('precipitation', 'Precipitation (mm)')
+)
+NUMERIC_CODES = tuple(code for name, code in NUMERIC_PARAMETERS)
+
+def read_water(water_file, dtype = np.float64):
     """
     Read data from a WATER output file.
     
     *Parameters:*
         water_file : path to text file from WATER application
+        
+        dtype : floating point type of the numeric arrays; np.float32 halves 
+        the memory used by the data at the cost of precision
     
     *Return:*
-        water_data : dictionary holding all data from a WATER file
+        water_data : dictionary holding all data from a WATER file; the 
+        numeric arrays are rows of a single 2-D array
         
         water_data = {
-            'date': dateObj,    
+            'date': dateObj,    # numpy datetime64[D] array
             'discharge': discharge,
             'subsurface flow': subsurfaceFlow,
             'impervious flow': imperviousFlow,
@@ -58,176 +82,230 @@ def read_water(water_file):
         Snow Pack                         
         Precipitation                          
     
+    An empty field is read as nan. Blank lines and rows that are missing 
+    columns are skipped and the number of skipped rows is printed. A field in
+    a row that has all its columns but is not a number raises a ValueError, 
+    whichever parser reads the file.
+    
     """
     
-    # Open file
-    f = open(water_file,'r')
-    
-    # Read all data 
-    dataFile = f.readlines()                       
-    
-    # Close file
-    f.close()
-    
-    # WATER parameter names
-    date_code = 'Date'    
-    discharge_code = 'Discharge (cfs)'
-    subsurfaceFlow_code = 'Subsurface Flow (cfs)'
-    imperviousFlow_code = 'Impervious Flow (mm)'
-    infiltrationExcess_code = 'Infiltration Excess (mm)'    
-    initialAbstractedFlow_code = 'Initial Abstracted Flow (mm)'
-    overlandFlow_code = 'Overland Flow (mm)'
-    pet_code = 'PET (mm)'
-    aet_code = 'AET(mm)'
-    averageSoilRootZone_code = 'Average Soil Root zone (mm)'
-    averageSoilUpperZone_code = 'Average Soil Upperzone (mm)'
-    snowPack_code = 'Snow Pack (mm)'
-    precipitation_code = 'Precipitation (mm)'
+    # Open file and read it line by line; the lines before the data are only 
+    # read up to the parameter row and the data rows are streamed to the parser 
+    # instead of holding the whole file in memory as a list of lines
+    with open(water_file, 'r') as f:
         
-    # Find data using idx as an iterator; assign iterator to index once search
-    # word is found
-    searchword = date_code
-    k = 0
-    for line in dataFile:
-        if searchword == line.split('\t')[0]:
-            idx = k
-        else:
-            k = k + 1        
-    
-    # read parameter row and strip any new line characters
-    parameterRow = dataFile[idx].split('\t')
-    dataCols = []
-    for param in parameterRow: 
-        dataCols.append(param.strip())
-    
-    # Assign each parameter index variable to None to make sure that each parameter has data
-    date_idx = None
-    discharge_idx = None
-    subsurfaceFlow_idx = None
-    imperviousFlow_idx = None
-    infiltrationExcess_idx = None
-    initialAbstractedFlow_idx = None
-    overlandFlow_idx = None
-    pet_idx = None
-    aet_idx = None
-    averageSoilRootZone_idx = None
-    averageSoilUpperZone_idx = None
-    snowPack_idx = None
-    precipitation_idx = None
-    
-    # Find index for each parameter in dataCols list
-    date_idx = dataCols.index(date_code)
-    discharge_idx = dataCols.index(discharge_code)
-    subsurfaceFlow_idx = dataCols.index(subsurfaceFlow_code)
-    imperviousFlow_idx = dataCols.index(imperviousFlow_code)
-    infiltrationExcess_idx = dataCols.index(infiltrationExcess_code)
-    initialAbstractedFlow_idx = dataCols.index(initialAbstractedFlow_code)
-    overlandFlow_idx = dataCols.index(overlandFlow_code)
-    pet_idx = dataCols.index(pet_code)
-    aet_idx = dataCols.index(aet_code)
-    averageSoilRootZone_idx = dataCols.index(averageSoilRootZone_code)
-    averageSoilUpperZone_idx = dataCols.index(averageSoilUpperZone_code)
-    snowPack_idx = dataCols.index(snowPack_code)
-    precipitation_idx = dataCols.index(precipitation_code)
+        # Find the parameter row; it is the first line whose first column is 
+        # the date code. Stop at that line, which leaves the file positioned at 
+        # the first row of data. Lines are read with readline so the rest of 
+        # the file can still be read in one piece.
+        searchword = DATE_CODE + '\t'
+        parameterLine = next((line for line in iter(f.readline, '') if line.startswith(searchword)), None)
+        if parameterLine is None:
+            raise ValueError("Cannot find parameter row in WATER file!")
+        
+        # read parameter row and strip any new line characters
+        dataCols = [param.strip() for param in parameterLine.split('\t')]
+        
+        # Map each column name to its index once instead of searching the 
+        # parameter row for each parameter
+        col_idx = {name: i for i, name in enumerate(dataCols)}
+        
+        # Find index for each parameter; date column first, then numeric columns
+        usecols = []
+        for code in (DATE_CODE,) + NUMERIC_CODES:
+            if code not in col_idx:
+                raise ValueError("Cannot find parameter " + code + " in WATER file!")
+            usecols.append(col_idx[code])
+        
+        # Get data of interest; parse the date column and all the numeric 
+        # columns of the remaining rows with the C extension if it is built, in
+        # compiled code if numba is installed, otherwise with a single call to
+        # the numpy parser instead of splitting each row and converting each 
+        # value in python. Missing values are read as nan, rows that are 
+        # missing columns are skipped and counted, and a value that is not a
+        # number raises a ValueError.
+        _water_parse = helpers.import_water_parse()
+        _kernels = helpers.import_kernels() if _water_parse is None else None
+        if _water_parse is not None:
+            dates, values, skipped = parse_rows_extension(text = f.read(), usecols = usecols, 
+                                                           _water_parse = _water_parse)
         
-    # Skip next line to get to data of interest by increasing index
-    idx = idx + 1
-    
-    # Get data of interest
-    date = []
-    discharge = []
-    subsurfaceFlow = []
-    imperviousFlow = []
-    infiltrationExcess = []
-    initialAbstractedFlow = []
-    overlandFlow = []
-    pet = []
-    aet = []
-    averageSoilRootZone = []
-    averageSoilUpperZone = []
-    snowPack = []
-    precipitation = []
-    for row in dataFile[idx:]:
-        try:
-            if date_idx is not None:
-                date.append(row.split('\t')[date_idx])
-            if discharge_idx  is not None:
-                discharge.append(float(row.split('\t')[discharge_idx]))
-            if subsurfaceFlow_idx  is not None:
-                subsurfaceFlow.append(float(row.split('\t')[subsurfaceFlow_idx]))
-            if imperviousFlow_idx  is not None:
-                imperviousFlow.append(float(row.split('\t')[imperviousFlow_idx]))
-            if infiltrationExcess_idx  is not None:
-                infiltrationExcess.append(float(row.split('\t')[infiltrationExcess_idx]))
-            if initialAbstractedFlow_idx  is not None:
-                initialAbstractedFlow.append(float(row.split('\t')[initialAbstractedFlow_idx]))
-            if overlandFlow_idx  is not None:
-                overlandFlow.append(float(row.split('\t')[overlandFlow_idx]))
-            if pet_idx  is not None:
-                pet.append(float(row.split('\t')[pet_idx]))
-            if aet_idx  is not None:
-                aet.append(float(row.split('\t')[aet_idx]))
-            if averageSoilRootZone_idx  is not None:
-                averageSoilRootZone.append(float(row.split('\t')[averageSoilRootZone_idx]))
-            if averageSoilUpperZone_idx  is not None:
-                averageSoilUpperZone.append(float(row.split('\t')[averageSoilUpperZone_idx]))
-            if snowPack_idx  is not None:
-                snowPack.append(float(row.split('\t')[snowPack_idx]))
-            if precipitation_idx  is not None:
-                precipitation.append(float(row.split('\t')[precipitation_idx]))
-        except:
-            print 'Missing data after date and time %s' %date[-1]
+        elif _kernels is not None:
+            dates, values, skipped = parse_rows(text = f.read(), usecols = usecols, _kernels = _kernels)
+        
+        else:
+            # count the lines that are not blank as they are read; the rows 
+            # that genfromtxt skips are the ones missing from its result
+            data_lines = [0]
+            def count_lines(lines):
+                for line in lines:
+                    if line.strip(' \r\n'):
+                        data_lines[0] += 1
+                    yield line
+            
+            # the skipped rows are reported once below instead of in a warning
+            # listing every row
+            with warnings.catch_warnings():
+                warnings.filterwarnings('ignore', message = 'Some errors were detected')
+                data = np.genfromtxt(count_lines(f), delimiter = '\t', usecols = usecols, 
+                                     dtype = ['S10'] + [np.float64] * (len(usecols) - 1), 
+                                     comments = None, invalid_raise = False, loose = False)
+            
+            # a file with a single row of data is read as a 0-d array
+            data = np.atleast_1d(data)
+            fields = data.dtype.names
+            dates = data[fields[0]]
+            skipped = data_lines[0] - len(data)
+            
+            # gather the numeric fields, which are interleaved in the records,
+            # into one array with a contiguous row for each column
+            values = np.empty((len(fields) - 1, len(data)), dtype = np.float64)
+            for row, field in zip(values, fields[1:]):
+                row[:] = data[field]
     
+    if skipped > 0:
+        print 'Missing data in %d rows of the WATER file; the rows were skipped' % skipped
+    
+    # convert the values once for all the parameters; no copy is made if the 
+    # values are already the requested type
+    values = values.astype(dtype, copy = False)
+    
+    # put data into a single dictionary; each numeric parameter is a row of the
+    # values array, in NUMERIC_PARAMETERS order, so all the parameters share 
+    # one block of memory and each one is contiguous
+    water_data = {'date': parse_dates(dates)}
+    for (name, code), row in zip(NUMERIC_PARAMETERS, values):
+        water_data[name] = row
+    
+    # Return WATER output variables
+    return water_data
 
-    # Convert date and times to a data object
-    dateObj = []
-    for val in date:
+def parse_rows_extension(text, usecols, _water_parse):
+    """
+    Parse the rows of data in a WATER file with the _water_parse C extension.
+    
+    *Parameters:*
+        text : string holding the rows of data
         
-        # Get date values from each date
-        month = val.split('/')[0]
-        day = val.split('/')[1]
-        year = val.split('/')[2]
-            
-        # Assign date values to a datetime object
-        d = datetime.datetime(int(year),int(month),int(day))
+        usecols : list of column indices; the date column followed by the 
+        numeric columns
+        
+        _water_parse : the _water_parse module
+    
+    *Return:*
+        dates : array of date strings
+        
+        values : 2-D array of values with a row for each numeric column in 
+        *usecols*
+        
+        skipped : number of rows skipped because they are missing columns
+    
+    """
+    # row of the values array for each column index; -1 for unused columns
+    col_slots = [-1] * (max(usecols) + 1)
+    for slot, col in enumerate(usecols[1:]):
+        col_slots[col] = slot
+    
+    # empty fields are filled with the same nan as genfromtxt
+    values, dates, rows, skipped = _water_parse.parse(text, usecols[0], col_slots, np.nan)
+    
+    # the arrays share the memory of the returned buffers; there is a row of 
+    # values for each numeric column with room for every line of text
+    capacity = len(dates) // 10
+    values = np.frombuffer(values, dtype = np.float64).reshape(len(usecols) - 1, capacity)
+    dates = np.frombuffer(dates, dtype = 'S10')[:rows]
+    
+    return dates, values[:, :rows], skipped
 
-        # Append data to dataObj list
-        dateObj.append(d)
+def parse_rows(text, usecols, _kernels):
+    """
+    Parse the rows of data in a WATER file with the numba compiled kernels.
+    The rows are parsed without creating a python object for each value; the 
+    few values that the kernels can not convert exactly are converted with 
+    float() afterwards.
+    
+    *Parameters:*
+        text : string holding the rows of data
         
-    # Convert data parameters to numpy arrays.
-    dateObj = np.array(dateObj)  
-    discharge = np.array(discharge)
-    subsurfaceFlow = np.array(subsurfaceFlow)
-    imperviousFlow = np.array(imperviousFlow)
-    infiltrationExcess = np.array(infiltrationExcess)
-    initialAbstractedFlow = np.array(initialAbstractedFlow)
-    overlandFlow = np.array(overlandFlow)
-    pet = np.array(pet)
-    aet = np.array(aet)
-    averageSoilRootZone = np.array(averageSoilRootZone)
-    averageSoilUpperZone = np.array(averageSoilUpperZone)
-    snowPack = np.array(snowPack)
-    precipitation = np.array(precipitation)
-    
-    # put data into a single dictionary
-    water_data = {
-            'date': dateObj,    
-            'discharge': discharge,
-            'subsurface flow': subsurfaceFlow,
-            'impervious flow': imperviousFlow,
-            'infiltration excess': infiltrationExcess,
-            'initial abstracted flow': initialAbstractedFlow,
-            'overland flow': overlandFlow,
-            'pet': pet,
-            'aet': aet,
-            'average soil root zone': averageSoilRootZone,
-            'average soil upper zone': averageSoilUpperZone,
-            'snow pack': snowPack,
-            'precipitation': precipitation
-    }
+        usecols : list of column indices; the date column followed by the 
+        numeric columns
+        
+        _kernels : the _kernels module
     
-    # Return WATER output variables
-    return water_data
+    *Return:*
+        dates : array of date strings
+        
+        values : 2-D array of values with a row for each numeric column in 
+        *usecols*
+        
+        skipped : number of rows skipped because they are missing columns
+    
+    """
+    buf = np.frombuffer(text, dtype = np.uint8)
+    
+    # row of the values array for each column index; -1 for unused columns
+    col_slots = np.full(max(usecols) + 1, -1, dtype = np.int64)
+    col_slots[list(usecols[1:])] = np.arange(len(usecols) - 1)
+    
+    # allocate for every line; blank lines and skipped rows are trimmed off. 
+    # The lines are counted by the string's own search for new line characters
+    capacity = text.count('\n')
+    if text and not text.endswith('\n'):
+        capacity += 1
+    dates = np.zeros((capacity, 10), dtype = np.uint8)
+    values = np.empty((len(usecols) - 1, capacity), dtype = np.float64)
+    
+    rows, skipped, unconverted = _kernels.parse_rows(buf, usecols[0], col_slots, dates, values)
+    
+    flat_values = values.reshape(-1)
+    for flat_idx, start, end in unconverted:
+        flat_values[flat_idx] = float(text[start:end])
+    
+    dates = dates.view('S10').reshape(-1)[:rows]
+    
+    return dates, values[:, :rows], skipped
+
+def parse_dates(dates):
+    """
+    Convert an array of month/day/year date strings to an array of numpy
+    datetime64 values with a resolution of one day. All the numbers in the 
+    dates are parsed with a single call to the numpy parser, and the dates are
+    built with array arithmetic instead of a datetime object per date.
+    
+    *Parameters:*
+        dates : array of date strings in month/day/year format; i.e. 6/14/2001
+    
+    *Return:*
+        dates : numpy datetime64[D] array
+    
+    *Example:*
+    
+    >>> parse_dates(['6/14/2001', '12/31/1999'])
+    
+    array(['2001-06-14', '1999-12-31'], dtype='datetime64[D]')
+    
+    """
+    if len(dates) == 0:
+        return np.array([], dtype = 'datetime64[D]')
+    
+    # parse all the numbers at once; each date gives a month, day, and year
+    values = np.fromstring('/'.join(dates), dtype = np.int64, sep = '/')
+    if values.size != 3 * len(dates):
+        raise ValueError("Bad date in WATER file!")
+    
+    months, days, years = values.reshape(-1, 3).T
+    if np.any((months < 1) | (months > 12) | (days < 1)):
+        raise ValueError("Bad date in WATER file!")
+    
+    # months since 1970-01 give the first day of each month; add the days 
+    first_days = ((years - 1970) * 12 + (months - 1)).astype('datetime64[M]')
+    parsed_dates = first_days.astype('datetime64[D]') + (days - 1)
+    
+    # a day that is past the end of its month rolls into the next month
+    if np.any(parsed_dates.astype('datetime64[M]') != first_days):
+        raise ValueError("Bad date in WATER file!")
+    
+    return parsed_dates
 
 def print_water(water_data):
     """ 
@@ -252,6 +330,12 @@ def main():
     file created by the WATER application.    
         
     """
+    # the dialog and plotting modules are only needed when the module is run as
+    # a script, so they are imported here; importing the module to read a file
+    # does not load them
+    import Tkinter, tkFileDialog
+    import matplotlib.pyplot as plt
+    
     # prompt user to get WATER output file
     fileFormat = [('Text file','*.txt')]
 
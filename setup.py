@@ -1,22 +1,52 @@
 try:
-	from setuptools import setup, find_packages
+	from setuptools import setup, find_packages, Extension
 except ImportError:
-	from distutils.core import setup
+	from distutils.core import setup, Extension
+	
+	def find_packages():
+		return ['hydrocomp']
+
+from distutils.command.build_ext import build_ext
+from distutils.errors import CCompilerError, DistutilsExecError, DistutilsPlatformError
 
 with open('README.md') as f:    
 	readme = f.read()
 
 with open('LICENSE.txt') as f:    
 	license = f.read()	
+
+class optional_build_ext(build_ext):
+	"""
+	Build the C extension if there is a compiler, otherwise warn and continue; 
+	water.py uses its other parsers when the extension is not built.
+	"""
+	def run(self):
+		try:
+			build_ext.run(self)
+		except DistutilsPlatformError:
+			self.warn('No compiler found; the C extension was not built')
+	
+	def build_extension(self, ext):
+		try:
+			build_ext.build_extension(self, ext)
+		except (CCompilerError, DistutilsExecError, DistutilsPlatformError):
+			self.warn('Could not build ' + ext.name + '; the C extension was not built')
+
+# C extension that parses WATER files
+water_parse = Extension('hydrocomp._water_parse', sources = ['hydrocomp/_water_parse.c'])
 	
 setup(
 	name = 'hydrocomp',
 	version = '0.0.1',
-	description = 'Compares timeseries output from a model of a particular parameter (i.e. discharge) with an observed timeseries of the same parameter.'
+	description = 'Compares timeseries output from a model of a particular parameter (i.e. discharge) with an observed timeseries of the same parameter.',
 	long_description = readme,
 	author = 'Jeremiah Lant',
 	author_email = 'jlant@usgs.gov',
 	url = 'https://github.com/jlant-usgs/hydrocomp',
 	license = license,
-	packages = find_packages()
+	packages = find_packages(),
+	ext_modules = [water_parse],
+	cmdclass = {'build_ext': optional_build_ext},
+	install_requires = ['numpy', 'matplotlib'],
+	python_requires = '>=2.7, <3'
 	)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+:Module: test_helpers.py
+
+:Author: Jeremiah Lant
+
+:Email: jlant@usgs.gov
+
+:Purpose:
+Tests for the helpers.py module.
+
+"""
+
+import os
+import sys
+import datetime
+import unittest
+
+import numpy as np
+
+# the modules import each other by name, so import them from their directory
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, os.pardir, 'hydrocomp'))
+
+import helpers
+
+class TestSubsetData(unittest.TestCase):
+
+    def setUp(self):
+        # daily dates like a WATER file
+        self.dates = np.arange('2001-06-01', '2001-06-11', dtype = 'datetime64[D]')
+        self.data = np.arange(10, dtype = np.float64)
+
+    def test_exact_bounds(self):
+        subset = helpers.subset_data(self.dates, self.data, np.datetime64('2001-06-03'), np.datetime64('2001-06-05'))
+
+        np.testing.assert_array_equal(subset.dates, np.arange('2001-06-03', '2001-06-06', dtype = 'datetime64[D]'))
+        np.testing.assert_array_equal(subset.data, [2, 3, 4])
+
+    def test_bounds_between_dates(self):
+        # every other day; the subset starts at the first date on or after the
+        # start date and ends at the last date on or before the end date
+        dates = self.dates[::2]
+        data = self.data[::2]
+        subset = helpers.subset_data(dates, data, np.datetime64('2001-06-02'), np.datetime64('2001-06-08'))
+
+        np.testing.assert_array_equal(subset.dates, np.array(['2001-06-03', '2001-06-05', '2001-06-07'], dtype = 'datetime64[D]'))
+        np.testing.assert_array_equal(subset.data, [2, 4, 6])
+
+    def test_bounds_outside_dates(self):
+        subset = helpers.subset_data(self.dates, self.data, np.datetime64('2001-05-01'), np.datetime64('2001-07-01'))
+
+        np.testing.assert_array_equal(subset.dates, self.dates)
+        np.testing.assert_array_equal(subset.data, self.data)
+
+    def test_datetime_and_datetime64_input(self):
+        expected = helpers.subset_data(self.dates, self.data, np.datetime64('2001-06-03'), np.datetime64('2001-06-05'))
+
+        # datetime bounds on datetime64 dates
+        subset = helpers.subset_data(self.dates, self.data, datetime.datetime(2001, 6, 3), datetime.datetime(2001, 6, 5))
+        np.testing.assert_array_equal(subset.dates, expected.dates)
+        np.testing.assert_array_equal(subset.data, expected.data)
+
+        # datetime dates like an NWIS file with datetime and datetime64 bounds
+        dates = np.array([datetime.datetime(2001, 6, day) for day in range(1, 11)], dtype = object)
+        for start_date, end_date in ((datetime.datetime(2001, 6, 3), datetime.datetime(2001, 6, 5)), 
+                                     (np.datetime64('2001-06-03'), np.datetime64('2001-06-05'))):
+            subset = helpers.subset_data(dates, self.data, start_date, end_date)
+            self.assertEqual(list(subset.dates), list(dates[2:5]))
+            np.testing.assert_array_equal(subset.data, expected.data)
+
+    def test_subset_return_value(self):
+        subset = helpers.subset_data(self.dates, self.data, np.datetime64('2001-06-03'), np.datetime64('2001-06-05'))
+
+        self.assertIsInstance(subset, helpers.Subset)
+        dates, data = subset
+        self.assertIs(dates, subset.dates)
+        self.assertIs(data, subset.data)
+
+        # the subset is a view of the arrays, not a copy
+        self.assertTrue(np.may_share_memory(subset.dates, self.dates))
+        self.assertTrue(np.may_share_memory(subset.data, self.data))
+
+    def test_no_dates_in_range(self):
+        # the range falls in a gap between two dates
+        dates = self.dates[[0, 9]]
+        data = self.data[[0, 9]]
+        self.assertRaises(ValueError, helpers.subset_data, dates, data, np.datetime64('2001-06-03'), np.datetime64('2001-06-05'))
+
+    def test_lengths_not_equal(self):
+        self.assertRaises(ValueError, helpers.subset_data, self.dates, self.data[:-1], self.dates[0], self.dates[-1])
+
+    def test_start_and_end_time_of_day(self):
+        # an instantaneous start or end time falls within a daily date; the 
+        # subset starts on the next date and ends on the date of the end time
+        subset = helpers.subset_data(self.dates, self.data, datetime.datetime(2001, 6, 3, 13, 15), 
+                                     np.datetime64('2001-06-07T08:30'))
+
+        np.testing.assert_array_equal(subset.dates, np.arange('2001-06-04', '2001-06-08', dtype = 'datetime64[D]'))
+        np.testing.assert_array_equal(subset.data, [3, 4, 5, 6])
+
+    def test_series_do_not_overlap(self):
+        # a range after the last date
+        self.assertRaises(ValueError, helpers.subset_data, self.dates, self.data,
+                          np.datetime64('2001-07-01'), np.datetime64('2001-07-31'))
+
+        # a range before the first date
+        self.assertRaises(ValueError, helpers.subset_data, self.dates, self.data,
+                          datetime.datetime(2001, 5, 1), datetime.datetime(2001, 5, 31))
+
+        # the dates of another series that does not overlap
+        other_dates = np.arange('2002-06-01', '2002-06-11', dtype = 'datetime64[D]')
+        start_date, end_date = helpers.find_start_end_dates(model_dates = self.dates, observed_dates = other_dates)
+        self.assertRaises(ValueError, helpers.subset_data, self.dates, self.data, start_date, end_date)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+:Module: test_hydrocompgui.py
+
+:Author: Jeremiah Lant
+
+:Email: jlant@usgs.gov
+
+:Purpose:
+Tests for the span selection stats of the hydrocompgui.py module. The stats
+computed from the prefix sums and block stats are compared with numpy and
+the functions in statistics.py on random spans of the data.
+
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# plot without a display
+import matplotlib
+matplotlib.use('Agg')
+
+# the modules import each other by name, so import them from their directory
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, os.pardir, 'hydrocomp'))
+
+import hydrocompgui
+import statistics
+
+class TestSpanStats(unittest.TestCase):
+
+    def setUp(self):
+        # a long series of discharge like values, a model of it, and the
+        # relative error; a few values are missing
+        random = np.random.RandomState(0)
+        self.observed = 1000 + np.cumsum(random.randn(2000))
+        self.modeled = self.observed + random.randn(2000)
+        self.relative_error = statistics.relative_error(self.modeled, self.observed)
+
+        self.missing = np.array([150, 151, 1200])
+        self.observed_missing = self.observed.copy()
+        self.observed_missing[self.missing] = np.nan
+        self.relative_error_missing = statistics.relative_error(self.modeled, self.observed_missing)
+
+        # random spans of at least three values, and spans at the ends and
+        # within a single block
+        starts = random.randint(0, 1997, 200)
+        ends = starts + 3 + (random.rand(200) * (2000 - 3 - starts)).astype(int)
+        self.spans = list(zip(starts, ends)) + [(0, 2000), (0, 3), (1997, 2000), (50, 60)]
+
+    def test_prefix_sum(self):
+        values = np.arange(5, dtype = np.float32)
+        prefix = hydrocompgui.prefix_sum(values)
+
+        np.testing.assert_array_equal(prefix, [0, 0, 1, 3, 6, 10])
+        self.assertEqual(prefix.dtype, np.float64)
+
+    def test_range_stats(self):
+        for values in (self.relative_error, self.relative_error.astype(np.float32)):
+            blocks = hydrocompgui.block_stats(values)
+            for start_idx, end_idx in self.spans:
+                selected = values[start_idx:end_idx]
+                mean, maximum, minimum = hydrocompgui.range_stats(blocks, start_idx, end_idx)
+
+                self.assertAlmostEqual(mean, np.mean(selected, dtype = np.float64), places = 12)
+                self.assertEqual(maximum, selected.max())
+                self.assertEqual(minimum, selected.min())
+
+    def test_range_stats_missing_values(self):
+        blocks = hydrocompgui.block_stats(self.relative_error_missing)
+        for start_idx, end_idx in self.spans:
+            selected = self.relative_error_missing[start_idx:end_idx]
+            stats = hydrocompgui.range_stats(blocks, start_idx, end_idx)
+
+            np.testing.assert_allclose(stats, (np.mean(selected), np.max(selected), np.min(selected)), rtol = 1e-12)
+
+    def test_range_coefficients(self):
+        prefix_sums = hydrocompgui.comparison_prefix_sums(self.observed, self.modeled)
+        for start_idx, end_idx in self.spans:
+            r_squared_coeff, nash_sutcliffe_coeff = hydrocompgui.range_coefficients(prefix_sums, start_idx, end_idx)
+            modeled = self.modeled[start_idx:end_idx]
+            observed = self.observed[start_idx:end_idx]
+
+            self.assertAlmostEqual(r_squared_coeff, statistics.r_squared(modeled, observed), places = 8)
+            self.assertAlmostEqual(nash_sutcliffe_coeff, statistics.nash_sutcliffe(modeled, observed), places = 8)
+
+    def test_range_coefficients_offset_data(self):
+        # the prefix sums are shifted, so a large offset does not cancel out
+        # the digits the coefficients depend on
+        prefix_sums = hydrocompgui.comparison_prefix_sums(self.observed + 1e6, self.modeled + 1e6)
+        for start_idx, end_idx in self.spans:
+            r_squared_coeff, nash_sutcliffe_coeff = hydrocompgui.range_coefficients(prefix_sums, start_idx, end_idx)
+            modeled = self.modeled[start_idx:end_idx]
+            observed = self.observed[start_idx:end_idx]
+
+            self.assertAlmostEqual(r_squared_coeff, statistics.r_squared(modeled, observed), places = 6)
+            self.assertAlmostEqual(nash_sutcliffe_coeff, statistics.nash_sutcliffe(modeled, observed), places = 6)
+
+    def test_range_coefficients_missing_values(self):
+        prefix_sums = hydrocompgui.comparison_prefix_sums(self.observed_missing, self.modeled)
+        for start_idx, end_idx in self.spans:
+            r_squared_coeff, nash_sutcliffe_coeff = hydrocompgui.range_coefficients(prefix_sums, start_idx, end_idx)
+            modeled = self.modeled[start_idx:end_idx]
+            observed = self.observed_missing[start_idx:end_idx]
+
+            if np.isnan(observed).any():
+                self.assertTrue(np.isnan(r_squared_coeff))
+                self.assertTrue(np.isnan(nash_sutcliffe_coeff))
+            else:
+                self.assertAlmostEqual(r_squared_coeff, statistics.r_squared(modeled, observed), places = 8)
+                self.assertAlmostEqual(nash_sutcliffe_coeff, statistics.nash_sutcliffe(modeled, observed), places = 8)
+
+if __name__ == '__main__':
+    unittest.main()
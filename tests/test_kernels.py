@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+:Module: test_kernels.py
+
+:Author: Jeremiah Lant
+
+:Email: jlant@usgs.gov
+
+:Purpose:
+Tests for the _kernels.py module. The numba compiled statistics are compared
+with the functions in statistics.py. The tests are skipped when numba is not
+installed.
+
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# the modules import each other by name, so import them from their directory
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, os.pardir, 'hydrocomp'))
+
+import statistics
+import helpers
+
+_kernels = helpers.import_kernels()
+
+@unittest.skipIf(_kernels is None, 'numba is not installed')
+class TestKernels(unittest.TestCase):
+
+    def setUp(self):
+        # a long series of discharge like values and a model of it
+        random = np.random.RandomState(0)
+        self.observed = 100 + np.cumsum(random.randn(5000))
+        self.modeled = self.observed + random.randn(5000)
+
+        # the sample data of the statistics.py examples
+        self.sample_modeled = np.array([55.5, 62.1, 65.3, 64.4, 61.2])
+        self.sample_observed = np.array([55.7, 62.0, 65.5, 64.7, 61.1])
+
+    def test_compute_all_stats(self):
+        for modeled, observed in ((self.modeled, self.observed), (self.sample_modeled, self.sample_observed)):
+            (relative_error, percent_error, percent_difference,
+             mean_squared_error, r_squared_coeff, nash_sutcliffe_coeff) = _kernels.compute_all_stats(modeled, observed, True, True, True)
+
+            np.testing.assert_allclose(relative_error, statistics.relative_error(modeled, observed), rtol = 1e-12)
+            np.testing.assert_allclose(percent_error, statistics.percent_error(modeled, observed), rtol = 1e-12)
+            np.testing.assert_allclose(percent_difference, statistics.percent_difference(modeled, observed), rtol = 1e-12)
+            self.assertAlmostEqual(mean_squared_error, statistics.mean_squared_error(modeled, observed), places = 10)
+            self.assertAlmostEqual(r_squared_coeff, statistics.r_squared(modeled, observed), places = 10)
+            self.assertAlmostEqual(nash_sutcliffe_coeff, statistics.nash_sutcliffe(modeled, observed), places = 10)
+
+    def test_compute_all_stats_without_error_arrays(self):
+        relative_error, percent_error, percent_difference = _kernels.compute_all_stats(self.modeled, self.observed, False, True, False)[:3]
+
+        self.assertEqual(len(relative_error), 0)
+        self.assertEqual(len(percent_error), len(self.observed))
+        self.assertEqual(len(percent_difference), 0)
+
+    def test_min_max_mean(self):
+        values = statistics.relative_error(self.modeled, self.observed)
+        minimum, maximum, mean = _kernels.min_max_mean(values)
+
+        self.assertEqual(minimum, values.min())
+        self.assertEqual(maximum, values.max())
+        self.assertAlmostEqual(mean, values.mean(), places = 12)
+
+    def test_min_max_mean_with_nan(self):
+        values = np.array([1.0, np.nan, 3.0])
+
+        self.assertTrue(all(np.isnan(_kernels.min_max_mean(values))))
+
+    def test_nse_and_r2(self):
+        for modeled, observed in ((self.modeled, self.observed), (self.sample_modeled, self.sample_observed)):
+            nash_sutcliffe_coeff, r_squared_coeff = _kernels.nse_and_r2(modeled, observed)
+
+            self.assertAlmostEqual(nash_sutcliffe_coeff, statistics.nash_sutcliffe(modeled, observed), places = 10)
+            self.assertAlmostEqual(r_squared_coeff, statistics.r_squared(modeled, observed), places = 10)
+
+    def test_nse_and_r2_offset_data(self):
+        # the kernel shifts the data before summing the squares, so a large
+        # offset does not cancel out the digits the coefficients depend on
+        modeled = self.modeled + 1e6
+        observed = self.observed + 1e6
+        nash_sutcliffe_coeff, r_squared_coeff = _kernels.nse_and_r2(modeled, observed)
+
+        self.assertAlmostEqual(nash_sutcliffe_coeff, statistics.nash_sutcliffe(self.modeled, self.observed), places = 8)
+        self.assertAlmostEqual(r_squared_coeff, statistics.r_squared(self.modeled, self.observed), places = 8)
+
+if __name__ == '__main__':
+    unittest.main()
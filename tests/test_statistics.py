@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+:Module: test_statistics.py
+
+:Author: Jeremiah Lant
+
+:Email: jlant@usgs.gov
+
+:Purpose:
+Tests for the statistics.py module.
+
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# the modules import each other by name, so import them from their directory
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, os.pardir, 'hydrocomp'))
+
+import statistics
+import helpers
+
+class TestStatistics(unittest.TestCase):
+
+    def setUp(self):
+        self.modeled = np.array([55.5, 62.1, 65.3, 64.4, 61.2])
+        self.observed = np.array([55.7, 62.0, 65.5, 64.7, 61.1])
+
+        # observed data that does not vary, like a constant flow
+        self.constant = np.array([10.0, 10.0, 10.0, 10.0, 10.0])
+
+    def test_nash_sutcliffe(self):
+        self.assertAlmostEqual(statistics.nash_sutcliffe(self.modeled, self.observed), 0.99682486631016043, places = 12)
+
+    def test_nash_sutcliffe_constant_observed(self):
+        with np.errstate(divide = 'ignore'):
+            coefficient = statistics.nash_sutcliffe(self.modeled, self.constant)
+
+        self.assertEqual(coefficient, -np.inf)
+
+    def test_nash_sutcliffe_single_value(self):
+        with np.errstate(invalid = 'ignore'):
+            coefficient = statistics.nash_sutcliffe(self.constant[:1], self.constant[:1])
+
+        self.assertTrue(np.isnan(coefficient))
+
+    def test_nse_and_r2_constant_observed_without_kernels(self):
+        import_kernels = helpers.import_kernels
+        helpers.import_kernels = lambda: None
+        try:
+            with np.errstate(divide = 'ignore', invalid = 'ignore'):
+                nash_sutcliffe_coeff, r_squared_coeff = statistics.nse_and_r2(self.modeled, self.constant)
+        finally:
+            helpers.import_kernels = import_kernels
+
+        self.assertEqual(nash_sutcliffe_coeff, -np.inf)
+        self.assertTrue(np.isnan(r_squared_coeff))
+
+    def test_percent_difference(self):
+        # the same as averaging the stacked arrays, to the last bit
+        random = np.random.RandomState(0)
+        modeled = random.rand(100000) * 100
+        observed = random.rand(100000) * 100
+        for x, x_true in ((self.modeled, self.observed), (modeled, observed), (np.array([1, 2, 3]), np.array([2, 2, 4]))):
+            expected = ((x - x_true) / np.average((x, x_true), axis = 0)) * 100
+            np.testing.assert_array_equal(statistics.percent_difference(x, x_true), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+:Module: test_water.py
+
+:Author: Jeremiah Lant
+
+:Email: jlant@usgs.gov
+
+:Purpose:
+Tests for the water.py module. Each parser that is available, the C extension
+and the numba compiled kernels, is compared with numpy's text parser on the
+WATER files in the data directory and on small files holding the edge cases
+of the data rows.
+
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+
+# the modules import each other by name, so import them from their directory
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(TESTS_DIR, os.pardir, 'data')
+sys.path.insert(0, os.path.join(TESTS_DIR, os.pardir, 'hydrocomp'))
+
+import water
+import helpers
+
+# parameter row of a WATER file
+HEADER = '\t'.join((water.DATE_CODE,) + water.NUMERIC_CODES) + '\n'
+
+# a row of data with a value in every column
+ROW = '6/14/2001\t1.5\t2\t0.25\t4\t5\t6e-3\t7\t8\t9\t10\t11\t12\n'
+
+def read_with(parser, water_file):
+    """
+    Read *water_file* with a single parser; 'extension', 'kernels', or
+    'genfromtxt'. The other parsers are made to look unavailable.
+    """
+    import_water_parse = helpers.import_water_parse
+    import_kernels = helpers.import_kernels
+
+    if parser != 'extension':
+        helpers.import_water_parse = lambda: None
+    if parser != 'kernels':
+        helpers.import_kernels = lambda: None
+
+    try:
+        with warnings.catch_warnings():
+            # genfromtxt warns about a file without rows of data
+            warnings.simplefilter('ignore')
+            return water.read_water(water_file)
+    finally:
+        helpers.import_water_parse = import_water_parse
+        helpers.import_kernels = import_kernels
+
+def available_parsers():
+    """
+    List the parsers that can be compared with genfromtxt.
+    """
+    parsers = []
+    if helpers.import_water_parse() is not None:
+        parsers.append('extension')
+    if helpers.import_kernels() is not None:
+        parsers.append('kernels')
+
+    return parsers
+
+class TestReadWater(unittest.TestCase):
+
+    def setUp(self):
+        self.parsers = available_parsers()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def write_water(self, rows, newline = '\n'):
+        """
+        Write a WATER file holding the parameter row followed by *rows* and
+        return its path.
+        """
+        path = os.path.join(self.temp_dir, 'WATER.txt')
+        with open(path, 'wb') as f:
+            f.write(('User:\ttest\n' + HEADER + ''.join(rows)).replace('\n', newline))
+
+        return path
+
+    def assert_same_as_genfromtxt(self, water_file):
+        """
+        Check that every available parser reads *water_file* the same as
+        genfromtxt and return the data genfromtxt read.
+        """
+        expected = read_with('genfromtxt', water_file)
+
+        for parser in self.parsers:
+            actual = read_with(parser, water_file)
+            self.assertEqual(sorted(actual), sorted(expected))
+            np.testing.assert_array_equal(actual['date'], expected['date'])
+            for name, code in water.NUMERIC_PARAMETERS:
+                self.assertEqual(actual[name].dtype, expected[name].dtype)
+                np.testing.assert_array_equal(actual[name], expected[name], err_msg = parser + ': ' + name)
+
+        return expected
+
+    def test_data_files(self):
+        for filename in ('WATER.txt', 'WATER_prospect.txt'):
+            data = self.assert_same_as_genfromtxt(os.path.join(DATA_DIR, filename))
+            self.assertEqual(len(data['date']), 3700)
+
+    def test_short_rows(self):
+        data = self.assert_same_as_genfromtxt(self.write_water([ROW, '6/15/2001\t1\t2\t3\n', ROW, '6/16/2001\n']))
+        self.assertEqual(len(data['date']), 2)
+
+    def test_blank_lines(self):
+        data = self.assert_same_as_genfromtxt(self.write_water(['\n', ROW, '\n', '  \n', ROW, '\n']))
+        self.assertEqual(len(data['date']), 2)
+
+    def test_crlf_line_endings(self):
+        data = self.assert_same_as_genfromtxt(self.write_water([ROW, ROW], newline = '\r\n'))
+        self.assertEqual(len(data['date']), 2)
+        self.assertEqual(data['precipitation'][-1], 12)
+
+    def test_empty_fields(self):
+        data = self.assert_same_as_genfromtxt(self.write_water([ROW, '6/15/2001\t\t2\t3\t4\t 5 \t\t7\t8\t9\t10\t11\t\n']))
+        self.assertTrue(np.isnan(data['discharge'][1]))
+        self.assertTrue(np.isnan(data['precipitation'][1]))
+        self.assertEqual(data['infiltration excess'][1], 4)
+
+    def test_single_row(self):
+        data = self.assert_same_as_genfromtxt(self.write_water([ROW]))
+        self.assertEqual(data['date'][0], np.datetime64('2001-06-14'))
+        self.assertEqual(data['discharge'][0], 1.5)
+        self.assertEqual(data['overland flow'][0], 6e-3)
+
+    def test_no_rows(self):
+        data = self.assert_same_as_genfromtxt(self.write_water([]))
+        self.assertEqual(len(data['date']), 0)
+        self.assertEqual(len(data['discharge']), 0)
+
+    def test_value_not_a_number(self):
+        water_file = self.write_water([ROW, ROW.replace('\t2\t', '\tabc\t')])
+        for parser in self.parsers + ['genfromtxt']:
+            self.assertRaises(ValueError, read_with, parser, water_file)
+
+    def test_missing_parameter_row(self):
+        water_file = self.write_water([])
+        with open(water_file, 'wb') as f:
+            f.write(ROW)
+
+        self.assertRaises(ValueError, water.read_water, water_file)
+
+if __name__ == '__main__':
+    unittest.main()